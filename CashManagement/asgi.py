@@ -0,0 +1,19 @@
+"""
+ASGI config for Name_ID_ManageCash project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Under ASGI the dashboard and transaction lists are served by their async
+views (see ASYNC_VIEWS in settings).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CashManagement.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+application = get_asgi_application()
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ManageCash.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -47,12 +48,25 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'ManageCash.context_processors.profile_context',
+                'ManageCash.context_processors.fragment_cache',
+                'ManageCash.context_processors.idempotency_key',
             ],
         },
     },
 ]
 
+# No 'loaders' option on purpose: Django then wraps the filesystem and app
+# directories loaders in its cached loader, so each template is compiled
+# once per process (the development autoreloader resets it when a template
+# changes). The per-user {% cache %} fragments (TEMPLATE_FRAGMENT_TIMEOUT)
+# save rendering on top of that.
+
 WSGI_APPLICATION = 'CashManagement.wsgi.application'
+ASGI_APPLICATION = 'CashManagement.asgi.application'
+
+# Serve the dashboard and transaction lists with their async views, which run
+# independent queries concurrently. CashManagement/asgi.py turns this on.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
 
 DATABASES = {
     'default': {
@@ -61,6 +75,77 @@ DATABASES = {
     }
 }
 
+# PRAGMAs run on every new SQLite connection (see ManageCash.database).
+SQLITE_PRAGMAS = {}
+
+# DATABASE_PROFILE=production tunes SQLite for several worker processes
+# writing at once: WAL so readers never block the writer, a busy timeout
+# instead of an immediate "database is locked", write transactions that
+# take the lock up front, memory-mapped reads and persistent connections.
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+    }
+
+# Read replicas: DATABASE_REPLICAS="/path/replica1.sqlite3,/path/replica2.sqlite3"
+# adds one alias per file. GET requests read ManageCash data from a random
+# replica; writes go to 'default', and a user who just wrote keeps reading
+# from 'default' for REPLICA_STICKY_SECONDS. Locally, manage.py sync_replicas
+# copies the primary into the replica files.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['ManageCash.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = 10
+
+# Per-user dashboard/list aggregates are cached here, along with the per-user
+# data versions that page ETags are built from, the write rate limit and
+# idempotency keys. LocMemCache is per process, so it only suits a single
+# process (runserver). Any deployment with more than one web or worker
+# process must point this at a shared backend such as
+# django.core.cache.backends.redis.RedisCache or
+# django.core.cache.backends.filebased.FileBasedCache; otherwise a write seen
+# by one process leaves the others answering 304 with stale pages.
+# manage.py check --deploy reports a per-process backend as ManageCash.E001.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cash-manager',
+    }
+}
+
+# Seconds a cached aggregate lives even without a write from that user
+USER_CACHE_TIMEOUT = 300
+
+# The dashboard and lists send an ETag built from the user's data version and
+# answer a matching If-None-Match with 304. Change this on deploys that alter
+# those templates so browsers fetch the new markup.
+PAGE_ETAG_SALT = os.environ.get('PAGE_ETAG_SALT', '')
+
+# Seconds the per-user navbar and dashboard summary card fragments stay
+# cached. They are keyed on the user's data version, so a profile change or a
+# write shows up at once; 0 renders them on every request.
+TEMPLATE_FRAGMENT_TIMEOUT = USER_CACHE_TIMEOUT
+
+# Loads request.user together with its Profile in one query
+AUTHENTICATION_BACKENDS = ['ManageCash.backends.ProfileBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -96,6 +181,95 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Keyset pagination for the cash and expense lists (?per_page= is capped at the max)
+TRANSACTION_PAGE_SIZE = 25
+TRANSACTION_PAGE_SIZE_MAX = 100
+
+# Rows per bulk_create when importing CSV/OFX statements
+TRANSACTION_IMPORT_BATCH_SIZE = 2000
+
+# Rows fetched per database round trip when streaming CSV/JSON exports
+TRANSACTION_EXPORT_CHUNK_SIZE = 2000
+
+# Most entries one bulk delete or re-categorize on a list page may touch
+BULK_EDIT_MAX_ITEMS = 500
+
+# Rows moved per transaction by manage.py archive_transactions
+ARCHIVE_BATCH_SIZE = 1000
+
+# Per-user limit on entry-creating requests (the add forms and API POSTs):
+# at most WRITE_RATE_LIMIT in any WRITE_RATE_WINDOW seconds, counted with a
+# sliding window in the cache (0 = no limit).
+WRITE_RATE_LIMIT = 60
+WRITE_RATE_WINDOW = 60
+
+# Seconds an Idempotency-Key (or the add forms' hidden key) is remembered;
+# repeating a request with the same key returns the first result.
+IDEMPOTENCY_KEY_TIMEOUT = 24 * 60 * 60
+
+# Most entries one JSON API POST may create (all in one transaction)
+API_BULK_MAX_ITEMS = 500
+
+# Longest report (in buckets) the reports page and JSON endpoint will return
+REPORT_MAX_BUCKETS = 366
+
+# Opt-in request instrumentation: put 'ManageCash.middleware.PerformanceMiddleware'
+# first in MIDDLEWARE. Requests slower than PERF_SLOW_REQUEST_MS (0 = all of
+# them) go to PERF_SLOW_LOG as JSON lines; summarise with manage.py perf_report.
+PERF_SLOW_REQUEST_MS = 500
+PERF_SLOW_LOG_SQL = 5
+PERF_SLOW_LOG = BASE_DIR / 'perf_slow.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'logging.FileHandler',
+            'filename': PERF_SLOW_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'ManageCash.slow_requests': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Profile pictures are validated in the request, then downscaled to at most
+# PROFILE_PICTURE_MAX_SIDE px and thumbnailed (48/256px, content-hashed file
+# names) by PROFILE_PICTURE_WORKERS background threads.
+PROFILE_PICTURE_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+PROFILE_PICTURE_MAX_PIXELS = 40_000_000
+PROFILE_PICTURE_MAX_SIDE = 1024
+PROFILE_PICTURE_WORKERS = 2
+PROFILE_PICTURE_ASYNC = True
+
+# Imports, large exports, report rebuilds and account deletion run as Jobs.
+# JOB_RUNNER: 'thread' runs them on JOB_WORKERS threads of the web process,
+# 'worker' leaves them to manage.py run_worker processes, 'inline' runs them
+# as soon as the request's transaction commits. A failed job is retried up to
+# JOB_MAX_ATTEMPTS times, JOB_RETRY_DELAY seconds later, doubling each time;
+# one running longer than JOB_TIMEOUT is assumed lost and queued again.
+# Finished jobs (and export files) are purged after JOB_KEEP_DAYS.
+JOB_RUNNER = os.environ.get('JOB_RUNNER', 'thread')
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 30
+JOB_TIMEOUT = 30 * 60
+JOB_KEEP_DAYS = 7
+# Staged uploads and finished exports (people's full statements) are kept
+# here, outside MEDIA_ROOT, and only served by the owner-checked download
+# view. Web and worker processes must share it.
+JOB_FILES_ROOT = BASE_DIR / 'private'
+
 # Media settings
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
@@ -11,6 +11,6 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Name_ID_ManageCash.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CashManagement.settings')
 
 application = get_wsgi_application()
\ No newline at end of file
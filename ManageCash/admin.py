@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import AddCash, Expense
+from .models import (
+    AddCash, ApiToken, ArchivedCash, ArchivedExpense, Expense, Job, OpeningBalance, PeriodSummary, UserBalance,
+)
 
 
 @admin.register(AddCash)
@@ -18,3 +20,61 @@ class ExpenseAdmin(admin.ModelAdmin):
     search_fields = ('description', 'user__username')
     ordering = ('-datetime',)
     readonly_fields = ('datetime',)
+
+
+@admin.register(ArchivedCash)
+class ArchivedCashAdmin(admin.ModelAdmin):
+    list_display = ('user', 'source', 'amount', 'datetime', 'archived_at')
+    search_fields = ('source', 'description', 'user__username')
+    ordering = ('-datetime',)
+    readonly_fields = ('datetime', 'archived_at')
+
+
+@admin.register(ArchivedExpense)
+class ArchivedExpenseAdmin(admin.ModelAdmin):
+    list_display = ('user', 'description', 'amount', 'datetime', 'archived_at')
+    search_fields = ('description', 'user__username')
+    ordering = ('-datetime',)
+    readonly_fields = ('datetime', 'archived_at')
+
+
+@admin.register(OpeningBalance)
+class OpeningBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'archived_before', 'total_added', 'total_spent', 'cash_count', 'expense_count')
+    search_fields = ('user__username',)
+    readonly_fields = ('archived_before', 'total_added', 'total_spent', 'cash_count', 'expense_count')
+
+
+@admin.register(UserBalance)
+class UserBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_added', 'total_spent', 'cash_count', 'expense_count', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('total_added', 'total_spent', 'cash_count', 'expense_count', 'updated_at')
+
+
+@admin.register(PeriodSummary)
+class PeriodSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'period', 'start', 'total_added', 'total_spent', 'cash_count', 'expense_count')
+    list_filter = ('period',)
+    search_fields = ('user__username',)
+    ordering = ('user', 'period', '-start')
+    readonly_fields = ('total_added', 'total_spent', 'cash_count', 'expense_count')
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ('user', 'name', 'created_at')
+    search_fields = ('user__username', 'name')
+    readonly_fields = ('key_hash', 'created_at')
+
+    def has_add_permission(self, request):
+        # Keys are only shown once, by manage.py create_api_token
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'user', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('user__username',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'worker')
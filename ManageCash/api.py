@@ -0,0 +1,296 @@
+import json
+from collections import defaultdict
+from decimal import Decimal
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+
+from .caching import data_etag, invalidate
+from .exporter import EXPORT_KINDS, day_bound, export_queryset
+from .ledger import adjust_balance, get_balance
+from .idempotency import HEADER, PENDING, claim, release, remember
+from .models import AddCash, ApiToken
+from .money import InvalidAmount, parse_amount
+from .pagination import paginate
+from .ratelimit import check_write_rate
+from .reports import adjust_rollups, apply_day_deltas, local_day
+
+SOURCE_MAX_LENGTH = AddCash._meta.get_field('source').max_length
+
+
+def get_bulk_max_items():
+    return getattr(settings, 'API_BULK_MAX_ITEMS', 500)
+
+
+def error(message, status=400, **extra):
+    return JsonResponse({'error': message, **extra}, status=status)
+
+
+def authenticate(request):
+    """The active user owning the ``Authorization: Token <key>`` header's key, or ``None``."""
+    scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() not in ('token', 'bearer') or not key.strip():
+        return None
+    token = (
+        ApiToken.objects.select_related('user')
+        .filter(key_hash=ApiToken.hash_key(key.strip()), user__is_active=True)
+        .first()
+    )
+    return token.user if token else None
+
+
+def api_view(*methods):
+    """
+    Token-authenticated JSON endpoint: no CSRF (no cookies are involved),
+    gzip for clients that accept it, JSON errors for 401/405.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error('Method not allowed.', status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            user = authenticate(request)
+            if user is None:
+                response = error('Authentication required.', status=401)
+                response['WWW-Authenticate'] = 'Token'
+                return response
+            request.user = user
+            return view(request, *args, **kwargs)
+        return gzip_page(csrf_exempt(wrapper))
+    return decorator
+
+
+def conditional(view):
+    """
+    Answer GET requests with 304 when ``If-None-Match`` holds the current ETag,
+    which only changes with the user's data version, so an unchanged list
+    costs a cache lookup instead of its queries.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+        etag = data_etag(request.user.pk, request.get_full_path())
+        # gzip turns our ETag into a weak one; compare them weakly
+        sent = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+        if etag in sent or '*' in sent:
+            response = HttpResponseNotModified()
+        else:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
+
+def serialize(kind, entry):
+    record = {
+        'id': entry.pk,
+        'type': EXPORT_KINDS[kind][1],
+        'amount': str(entry.amount),
+        'description': entry.description,
+        'datetime': entry.datetime.isoformat(),
+    }
+    if kind == 'cash':
+        record['source'] = entry.source
+    return record
+
+
+def build_entry(kind, user, data, now):
+    """Validate one JSON object into an unsaved entry; raises ValueError with a message."""
+    if not isinstance(data, dict):
+        raise ValueError('Each entry must be a JSON object.')
+    model = EXPORT_KINDS[kind][0]
+    try:
+        amount = parse_amount(data.get('amount', ''))
+    except InvalidAmount as exc:
+        raise ValueError(f'{exc}.')
+
+    description = data.get('description', '')
+    if not isinstance(description, str) or (model is not AddCash and not description.strip()):
+        raise ValueError('Description is required.')
+    values = {'user': user, 'amount': amount, 'description': description, 'datetime': now}
+    if model is AddCash:
+        source = data.get('source', '')
+        if not isinstance(source, str) or not source.strip():
+            raise ValueError('Source is required.')
+        if len(source) > SOURCE_MAX_LENGTH:
+            raise ValueError(f'Source is longer than {SOURCE_MAX_LENGTH} characters.')
+        values['source'] = source
+
+    if data.get('datetime'):
+        stamp = parse_datetime(str(data['datetime']))
+        if stamp is None:
+            raise ValueError('Datetime must be ISO 8601.')
+        if settings.USE_TZ and timezone.is_naive(stamp):
+            stamp = timezone.make_aware(stamp)
+        values['datetime'] = stamp
+    return model(**values)
+
+
+def create_entries(kind, user, entries):
+    """Insert validated entries in one transaction and update the ledger and rollups once."""
+    model = EXPORT_KINDS[kind][0]
+    is_cash = model is AddCash
+    total, days = Decimal('0'), defaultdict(lambda: [Decimal('0'), Decimal('0'), 0, 0])
+    tz = timezone.get_current_timezone()
+    for entry in entries:
+        total += entry.amount
+        day = days[local_day(entry.datetime, tz)]
+        day[0 if is_cash else 1] += entry.amount
+        day[2 if is_cash else 3] += 1
+
+    with transaction.atomic():
+        created = model.objects.bulk_create(entries)
+        if is_cash:
+            adjust_balance(user, added=total, cash_count=len(created))
+        else:
+            adjust_balance(user, spent=total, expense_count=len(created))
+        apply_day_deltas(user, days)
+        # bulk_create skips the signals that normally do this
+        transaction.on_commit(lambda: invalidate(user.pk))
+    return created
+
+
+def _read_json(request):
+    try:
+        # Decimal keeps amounts sent as JSON numbers exact
+        return json.loads(request.body or b'null', parse_float=Decimal)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Request body must be JSON.')
+
+
+@api_view('GET', 'POST')
+@conditional
+def entry_list(request, kind):
+    """
+    GET: the user's entries, newest first, keyset-paginated like the list
+    pages (``after``/``before``/``per_page``) and filtered by ``q``,
+    ``start`` and ``end``. POST: one entry as an object, or up to
+    API_BULK_MAX_ITEMS as an array, created together or not at all.
+    """
+    if request.method == 'POST':
+        return _create(request, kind)
+
+    try:
+        start = day_bound(request.GET.get('start'))
+        end = day_bound(request.GET.get('end'), end=True)
+    except ValueError:
+        return error('Dates must look like YYYY-MM-DD.')
+    queryset = export_queryset(kind, request.user, request.GET.get('q', ''), start, end)
+    page = paginate(queryset, request)
+    return JsonResponse({
+        'results': [serialize(kind, entry) for entry in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def _create(request, kind):
+    """
+    A request repeating an earlier one's Idempotency-Key gets the first
+    response back (marked ``Idempotent-Replayed``) instead of inserting
+    again; only successful creates are remembered.
+    """
+    user_id, key, scope = request.user.pk, request.headers.get(HEADER, '').strip()[:255], f'api:{kind}'
+    if key:
+        stored = claim(user_id, scope, key)
+        if stored == PENDING:
+            return error(f'A request with this {HEADER} is still being processed.', status=409)
+        if stored is not None:
+            response = JsonResponse(stored['body'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+    try:
+        response, body = _insert(request, kind)
+    except Exception:
+        if key:
+            release(user_id, scope, key)
+        raise
+    if key:
+        if response.status_code == 201:
+            remember(user_id, scope, key, {'status': 201, 'body': body})
+        else:
+            release(user_id, scope, key)
+    return response
+
+
+def _insert(request, kind):
+    """The create response, with its JSON body if it succeeded."""
+    wait = check_write_rate(request.user.pk)
+    if wait:
+        response = error('Too many write requests.', status=429, retry_after=wait)
+        response['Retry-After'] = str(wait)
+        return response, None
+
+    try:
+        data = _read_json(request)
+    except ValueError as exc:
+        return error(str(exc)), None
+    many = isinstance(data, list)
+    items = data if many else [data]
+    if not items:
+        return error('No entries given.'), None
+    if len(items) > get_bulk_max_items():
+        return error(f'At most {get_bulk_max_items()} entries per request.', status=413), None
+
+    now, entries, problems = timezone.now(), [], []
+    for index, item in enumerate(items):
+        try:
+            entries.append(build_entry(kind, request.user, item, now))
+        except ValueError as exc:
+            problems.append({'index': index, 'error': str(exc)})
+    if problems:
+        return error('Invalid entries; nothing was saved.', errors=problems), None
+
+    created = [serialize(kind, entry) for entry in create_entries(kind, request.user, entries)]
+    body = {'created': created} if many else created[0]
+    return JsonResponse(body, status=201), body
+
+
+@api_view('GET', 'DELETE')
+@conditional
+def entry_detail(request, kind, pk):
+    model = EXPORT_KINDS[kind][0]
+    try:
+        entry = model.objects.get(pk=pk, user=request.user)
+    except model.DoesNotExist:
+        return error('Not found.', status=404)
+
+    if request.method == 'DELETE':
+        with transaction.atomic():
+            # A repeated or concurrent delete of the same entry removes nothing
+            deleted, _ = model.objects.filter(pk=pk, user=request.user).delete()
+            if deleted:
+                if model is AddCash:
+                    delta = {'added': -entry.amount, 'cash_count': -1}
+                else:
+                    delta = {'spent': -entry.amount, 'expense_count': -1}
+                adjust_balance(request.user, **delta)
+                adjust_rollups(request.user, entry.datetime, **delta)
+        return HttpResponse(status=204)
+    return JsonResponse(serialize(kind, entry))
+
+
+@api_view('GET')
+@conditional
+def summary(request):
+    """Balance and totals from the running ledger."""
+    ledger = get_balance(request.user)
+    return JsonResponse({
+        'balance': str(ledger.balance),
+        'total_added': str(ledger.total_added),
+        'total_spent': str(ledger.total_spent),
+        'cash_count': ledger.cash_count,
+        'expense_count': ledger.expense_count,
+    })
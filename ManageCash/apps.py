@@ -6,4 +6,5 @@ class ManagecashConfig(AppConfig):
     name = 'ManageCash'
     
     def ready(self):
+        import ManageCash.checks
         import ManageCash.signals
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .caching import deferred_invalidation, invalidate
+from .database import RowsChanged
+from .models import AddCash, ArchivedCash, ArchivedExpense, Expense, OpeningBalance
+from .money import to_cents
+
+# hot model -> (archive model, OpeningBalance total field, count field)
+ARCHIVES = {
+    AddCash: (ArchivedCash, 'added_cents', 'cash_count'),
+    Expense: (ArchivedExpense, 'spent_cents', 'expense_count'),
+}
+
+
+def get_batch_size():
+    return getattr(settings, 'ARCHIVE_BATCH_SIZE', 1000)
+
+
+def archive_model(model):
+    return ARCHIVES[model][0]
+
+
+def get_opening_balance(user):
+    """The totals of the user's archived rows, or ``None`` if nothing was archived."""
+    return OpeningBalance.objects.filter(user=user).first()
+
+
+def reaches_archive(user, start):
+    """True if a range beginning at ``start`` (``None``: from the first entry) includes archived rows."""
+    opening = get_opening_balance(user)
+    return opening is not None and (start is None or start < opening.archived_before)
+
+
+def archive_batch(user, model, before, batch_size):
+    """
+    Move up to ``batch_size`` of the user's oldest ``model`` rows dated
+    before ``before`` into the archive table and add them to the user's
+    opening balance, all in one transaction. Returns how many were moved.
+    Raises RowsChanged, moving nothing, if another request deleted some of
+    the rows meanwhile.
+    """
+    archived, total_field, count_field = ARCHIVES[model]
+    fields = [field.attname for field in model._meta.concrete_fields]
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update().filter(user=user, datetime__lt=before)
+            .order_by('datetime', 'pk')
+            .values(*fields)[:batch_size]
+        )
+        if not rows:
+            return 0
+        archived.objects.bulk_create(archived(**row) for row in rows)
+        # archive_user invalidates the user's cache once at the end
+        with deferred_invalidation():
+            deleted, _ = model.objects.filter(user=user, pk__in=[row['id'] for row in rows]).delete()
+        if deleted != len(rows):
+            raise RowsChanged('Entries were deleted while being archived.')
+
+        opening, _ = OpeningBalance.objects.get_or_create(user=user, defaults={'archived_before': before})
+        OpeningBalance.objects.filter(pk=opening.pk).update(
+            archived_before=Greatest(F('archived_before'), before),
+            **{
+                total_field: F(total_field) + sum(to_cents(row['amount']) for row in rows),
+                count_field: F(count_field) + len(rows),
+            },
+        )
+    return len(rows)
+
+
+def archive_user(user, before, batch_size=None):
+    """
+    Archive all of the user's entries dated before ``before``, batch by
+    batch. The ledger and report rollups are unchanged since they already
+    cover these rows. Returns ``{model: rows moved}``.
+    """
+    batch_size = batch_size or get_batch_size()
+    moved = {}
+    try:
+        for model in ARCHIVES:
+            moved[model] = 0
+            while True:
+                count = archive_batch(user, model, before, batch_size)
+                moved[model] += count
+                if count < batch_size:
+                    break
+    finally:
+        # Batches committed before a RowsChanged stay archived
+        if any(moved.values()):
+            invalidate(user.pk)
+    return moved
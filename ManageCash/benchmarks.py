@@ -0,0 +1,64 @@
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+WORDS = (
+    'salary bonus freelance refund rent grocery coffee transport fuel '
+    'internet electricity dinner lunch gift medicine books tuition repair'
+).split()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def synthetic_rows(rng, cash, expenses, days, end=None):
+    """
+    Yield ``(line, row)`` pairs in the importer's CSV row format: ``cash``
+    income and ``expenses`` expense entries spread at random over the
+    ``days`` days before ``end``.
+    """
+    end = end or timezone.now()
+    span = int(days * 86400)
+    kinds = ['income'] * cash + ['expense'] * expenses
+    rng.shuffle(kinds)
+    for line, kind in enumerate(kinds, start=1):
+        stamp = end - timedelta(seconds=rng.randrange(span or 1))
+        yield line, {
+            'type': kind,
+            'amount': f'{rng.randint(100, 500_000) / 100:.2f}',
+            'source': rng.choice(WORDS) if kind == 'income' else '',
+            'description': ' '.join(rng.sample(WORDS, 3)),
+            'date': stamp.isoformat(),
+        }
+
+
+@contextmanager
+def throwaway_database():
+    """
+    Run the block on a freshly migrated SQLite file in a temporary
+    directory (yielded) instead of the configured database, then delete it.
+    For commands that seed or rewrite data to measure something.
+    """
+    if connection.vendor != 'sqlite':
+        raise CommandError('This command measures SQLite; the default database is not SQLite.')
+    with tempfile.TemporaryDirectory() as directory:
+        # Django's test database machinery points every connection at the
+        # new file and puts the real name back afterwards
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_name = test_settings.get('NAME')
+        test_settings['NAME'] = os.path.join(directory, 'throwaway.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield directory
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = test_name
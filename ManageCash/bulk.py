@@ -0,0 +1,63 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import deferred_invalidation, invalidate
+from .database import RowsChanged
+from .ledger import adjust_balance
+from .models import AddCash
+from .reports import apply_day_deltas, local_day
+
+
+def get_max_items():
+    return getattr(settings, 'BULK_EDIT_MAX_ITEMS', 500)
+
+
+def delete_entries(user, model, pks):
+    """
+    Delete the user's ``model`` rows among ``pks`` (others' ids are
+    ignored) and take them off the ledger and rollups, in one transaction:
+    one query reads the owned rows' amounts and dates, one
+    QuerySet.delete() removes them. Returns how many were deleted. Raises RowsChanged, deleting
+    nothing, if another request deleted some of them in between.
+    """
+    is_cash = model is AddCash
+    with transaction.atomic():
+        owned = model.objects.select_for_update().filter(user=user, pk__in=pks)
+        rows = list(owned.values_list('pk', 'amount', 'datetime'))
+        if not rows:
+            return 0
+        # The cache is invalidated once below, not per deleted row
+        with deferred_invalidation():
+            deleted, _ = model.objects.filter(user=user, pk__in=[pk for pk, _, _ in rows]).delete()
+        if deleted != len(rows):
+            raise RowsChanged('Entries were deleted by another request.')
+
+        total = Decimal('0')
+        days = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0, 0])
+        tz = timezone.get_current_timezone()
+        for _, amount, stamp in rows:
+            total += amount
+            day = days[local_day(stamp, tz)]
+            day[0 if is_cash else 1] -= amount
+            day[2 if is_cash else 3] -= 1
+        if is_cash:
+            adjust_balance(user, added=-total, cash_count=-len(rows))
+        else:
+            adjust_balance(user, spent=-total, expense_count=-len(rows))
+        apply_day_deltas(user, days)
+        transaction.on_commit(lambda: invalidate(user.pk))
+    return len(rows)
+
+
+def set_source(user, pks, source):
+    """Re-categorize the user's incomes among ``pks`` under ``source`` with one UPDATE. Returns the count."""
+    with transaction.atomic():
+        updated = AddCash.objects.filter(user=user, pk__in=pks).update(source=source)
+        # update() sends no signals; the search index follows through its triggers
+        if updated:
+            transaction.on_commit(lambda: invalidate(user.pk))
+    return updated
@@ -0,0 +1,151 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Cached sections; each gets its own hit/miss counters.
+SECTIONS = ('dashboard', 'cash_list', 'expense_list')
+_MISSING = object()
+_deferred = ContextVar('cm_invalidation_deferred', default=False)
+
+
+def get_cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 300)
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'TEMPLATE_FRAGMENT_TIMEOUT', get_timeout())
+
+
+def _version_key(user_id):
+    return f'cm:version:{user_id}'
+
+
+def data_version(user_id):
+    """
+    The user's current data version. It starts from a timestamp rather than
+    1 so a version key that was evicted never comes back as an old value
+    whose entries are still cached.
+    """
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def adata_version(user_id):
+    """data_version() for async views."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def invalidate(user_id):
+    """Move the user to a new data version; everything cached before is skipped."""
+    try:
+        get_cache().incr(_version_key(user_id))
+    except ValueError:
+        # No version yet, so nothing has been cached for this user.
+        pass
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Within this block, saving or deleting entries doesn't invalidate the
+    user's cache (see signals.invalidate_user_cache), so a bulk write
+    that sends a signal per row can invalidate once itself afterwards.
+    """
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+
+def invalidation_deferred():
+    return _deferred.get()
+
+
+def data_etag(user_id, *parts):
+    """
+    An ETag that changes whenever the user's data version (see invalidate)
+    or any of ``parts`` does, computed without touching the database.
+    """
+    digest = hashlib.md5('\x1f'.join(map(str, parts)).encode()).hexdigest()[:16]
+    return f'"{data_version(user_id)}-{digest}"'
+
+
+def _count(section, outcome):
+    cache = get_cache()
+    key = f'cm:stats:{section}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _entry_key(user_id, version, section, parts):
+    suffix = hashlib.md5('\x1f'.join(map(str, parts)).encode()).hexdigest() if parts else ''
+    return f'cm:{user_id}:{version}:{section}:{suffix}'
+
+
+def cached(user_id, section, compute, *parts):
+    """
+    Return ``compute()`` for this user, section and extra key ``parts``,
+    cached until the user's data changes or USER_CACHE_TIMEOUT passes.
+    """
+    key = _entry_key(user_id, data_version(user_id), section, parts)
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        _count(section, 'misses')
+        value = compute()
+        cache.set(key, value, get_timeout())
+    else:
+        _count(section, 'hits')
+    return value
+
+
+async def acached(user_id, section, compute, *parts):
+    """cached() for async views: ``compute`` is a coroutine function."""
+    cache = get_cache()
+    key = _entry_key(user_id, await adata_version(user_id), section, parts)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        _count(section, 'misses')
+        value = await compute()
+        await cache.aset(key, value, get_timeout())
+    else:
+        _count(section, 'hits')
+    return value
+
+
+def stats():
+    """Hit/miss counters per section, as seen by this cache backend."""
+    cache = get_cache()
+    keys = [f'cm:stats:{section}:{outcome}' for section in SECTIONS for outcome in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    return {
+        section: {
+            outcome: values.get(f'cm:stats:{section}:{outcome}', 0)
+            for outcome in ('hits', 'misses')
+        }
+        for section in SECTIONS
+    }
+
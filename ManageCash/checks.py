@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Cache backends whose contents each process keeps to itself
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_user_cache(app_configs, **kwargs):
+    """
+    The per-user data versions behind the page ETags and cached aggregates,
+    the write rate limit and the idempotency keys all live in the user cache,
+    so every web and worker process must share it.
+    """
+    alias = getattr(settings, 'USER_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f"CACHES['{alias}'] uses {backend.rsplit('.', 1)[-1]}, which is not shared between processes.",
+        hint='Use RedisCache, PyMemcacheCache or FileBasedCache; with several workers a write '
+             'seen by one would leave the others serving stale pages and cached totals.',
+        id='ManageCash.E001',
+    )]
@@ -1,10 +1,37 @@
+from django.utils.functional import SimpleLazyObject
+
+from .caching import data_version, get_fragment_timeout
+from .idempotency import new_key
 from .models import Profile
 
+
+def get_profile(user):
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        return Profile.objects.create(user=user)
+
+
 def profile_context(request):
     if request.user.is_authenticated:
-        try:
-            profile = request.user.profile
-        except Profile.DoesNotExist:
-            profile = Profile.objects.create(user=request.user)
-        return {'user_profile': profile}
+        # Only resolved if a template actually reads user_profile.
+        return {'user_profile': SimpleLazyObject(lambda: get_profile(request.user))}
     return {'user_profile': None}
+
+
+def fragment_cache(request):
+    """
+    Timeout and version for the per-user {% cache %} fragments. The version
+    is the user's data version, which signals bump on profile and
+    transaction changes; views that already read it pass their own.
+    """
+    if request.user.is_authenticated:
+        version = SimpleLazyObject(lambda: data_version(request.user.pk))
+    else:
+        version = 0
+    return {'fragment_timeout': get_fragment_timeout(), 'cache_version': version}
+
+
+def idempotency_key(request):
+    # A fresh key for the hidden field of each rendered entry form
+    return {'idempotency_key': SimpleLazyObject(new_key)}
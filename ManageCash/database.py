@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import DatabaseError
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_pragmas(connection):
+    """Run SQLITE_PRAGMAS on a newly opened SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def current_pragmas(connection, names=None):
+    """The values SQLite reports for ``names`` (default: SQLITE_PRAGMAS) on this connection."""
+    names = names or list(get_pragmas()) or ['journal_mode', 'synchronous', 'busy_timeout']
+    values = {}
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
+
+
+class RowsChanged(DatabaseError):
+    """Rows read earlier in the transaction were gone by the time it deleted them."""
+
@@ -0,0 +1,111 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .archive import archive_model, reaches_archive
+from .models import AddCash, Expense
+from .search import search
+
+# Same columns as the CSV importer reads, so an export can be imported again.
+EXPORT_COLUMNS = ('type', 'amount', 'source', 'description', 'date')
+EXPORT_KINDS = {
+    'cash': (AddCash, 'income', ('amount', 'source', 'description', 'datetime')),
+    'expense': (Expense, 'expense', ('amount', 'description', 'datetime')),
+}
+CONTENT_TYPES = {'csv': 'text/csv', 'json': 'application/json'}
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def get_chunk_size():
+    return getattr(settings, 'TRANSACTION_EXPORT_CHUNK_SIZE', 2000)
+
+
+def day_bound(value, end=False):
+    """
+    Parse ``YYYY-MM-DD`` into an aware datetime at the start of that day, or
+    of the next day when ``end`` is set so the range includes the end date.
+    Raises ``ValueError`` for anything else; an empty value gives ``None``.
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f'invalid date {value!r}')
+    if end:
+        day += timedelta(days=1)
+    stamp = datetime.combine(day, time.min)
+    return timezone.make_aware(stamp) if settings.USE_TZ else stamp
+
+
+def export_queryset(kind, user, query='', start=None, end=None, archived=False):
+    """The rows to export: a user's (archived) entries, newest first, filtered like the list views."""
+    model = EXPORT_KINDS[kind][0]
+    if archived:
+        model = archive_model(model)
+    queryset = model.objects.for_user(user)
+    if query:
+        queryset = search(queryset, query)
+    if start:
+        queryset = queryset.filter(datetime__gte=start)
+    if end:
+        queryset = queryset.filter(datetime__lt=end)
+    return queryset
+
+
+def export_querysets(kind, user, query='', start=None, end=None):
+    """
+    What to stream for an export: the hot table's rows, then the archived
+    ones if the range reaches back before the archive cutoff.
+    """
+    querysets = [export_queryset(kind, user, query, start, end)]
+    if reaches_archive(user, start):
+        querysets.append(export_queryset(kind, user, query, start, end, archived=True))
+    return querysets
+
+
+def export_records(kind, querysets):
+    """Yield one dict per entry, reading ``values_list`` rows a chunk at a time."""
+    _, label, fields = EXPORT_KINDS[kind]
+    for queryset in querysets:
+        for values in queryset.values_list(*fields).iterator(chunk_size=get_chunk_size()):
+            row = dict(zip(fields, values))
+            yield {
+                'type': label,
+                'amount': str(row['amount']),
+                'source': row.get('source', ''),
+                'description': row['description'],
+                'date': row['datetime'].isoformat(),
+            }
+
+
+def stream_csv(kind, querysets):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for record in export_records(kind, querysets):
+        yield writer.writerow([record[column] for column in EXPORT_COLUMNS])
+
+
+def stream_json(kind, querysets):
+    yield '['
+    separator = '\n'
+    for record in export_records(kind, querysets):
+        yield separator + json.dumps(record)
+        separator = ',\n'
+    yield '\n]\n'
+
+
+def stream_export(kind, querysets, fmt='csv'):
+    """Generator of text pieces for the chosen format, shared by the view and command."""
+    if fmt == 'json':
+        return stream_json(kind, querysets)
+    return stream_csv(kind, querysets)
@@ -0,0 +1,53 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+
+from .caching import get_cache
+
+# Stored while the first request with a key is still running
+PENDING = 'pending'
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+
+
+def get_timeout():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TIMEOUT', 24 * 60 * 60)
+
+
+def new_key():
+    """A key for a form to send back, so a resubmitted form is recognised."""
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    """The request's ``Idempotency-Key`` header or hidden form field, or ``''``."""
+    return (request.headers.get(HEADER) or request.POST.get(FIELD, '')).strip()[:255]
+
+
+def _cache_key(user_id, scope, key):
+    return f'cm:idem:{user_id}:{scope}:{hashlib.md5(key.encode()).hexdigest()}'
+
+
+def claim(user_id, scope, key):
+    """
+    Reserve ``key`` for this user and scope. Returns ``None`` if the caller
+    now owns it and should do the write, else what the first request stored:
+    PENDING while it is still running, then its result (see remember).
+    One cache call; ``add`` makes concurrent claims race safely.
+    """
+    cache_key = _cache_key(user_id, scope, key)
+    cache = get_cache()
+    if cache.add(cache_key, PENDING, get_timeout()):
+        return None
+    return cache.get(cache_key, PENDING)
+
+
+def remember(user_id, scope, key, result):
+    """Store the result replays of ``key`` get, for IDEMPOTENCY_KEY_TIMEOUT seconds."""
+    get_cache().set(_cache_key(user_id, scope, key), result, get_timeout())
+
+
+def release(user_id, scope, key):
+    """Forget a claim whose request wrote nothing, so the key can be retried."""
+    get_cache().delete(_cache_key(user_id, scope, key))
@@ -0,0 +1,198 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+# Profile fields holding processed files, and the square size of each thumbnail
+PICTURE_FIELDS = ('profile_picture', 'thumbnail_small', 'thumbnail_large')
+THUMBNAIL_SIZES = {'thumbnail_small': 48, 'thumbnail_large': 256}
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+PICTURE_DIR = 'profile_pics'
+PENDING_DIR = f'{PICTURE_DIR}/pending'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def get_max_upload_size():
+    return getattr(settings, 'PROFILE_PICTURE_MAX_UPLOAD_SIZE', 5 * 1024 * 1024)
+
+
+def get_max_pixels():
+    return getattr(settings, 'PROFILE_PICTURE_MAX_PIXELS', 40_000_000)
+
+
+def get_max_side():
+    return getattr(settings, 'PROFILE_PICTURE_MAX_SIDE', 1024)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PROFILE_PICTURE_WORKERS', 2),
+                thread_name_prefix='profile-pictures',
+            )
+    return _executor
+
+
+def validate_upload(upload):
+    """Cheap checks done in the request: size, and a header that parses as an allowed image."""
+    if upload.size > get_max_upload_size():
+        raise InvalidImage(f'Profile picture must be {get_max_upload_size() // (1024 * 1024)}MB or smaller')
+    try:
+        with Image.open(upload) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise InvalidImage('Profile picture must be a JPG, PNG, GIF or WebP image')
+            if image.width * image.height > get_max_pixels():
+                raise InvalidImage('Profile picture has too many pixels')
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise InvalidImage('Profile picture is not a valid image')
+    finally:
+        upload.seek(0)
+
+
+def stage_upload(profile, upload):
+    """
+    Store a validated upload as the profile's pending picture and process it
+    on a worker thread once the current transaction commits.
+    """
+    extension = os.path.splitext(upload.name)[1].lower()[:10]
+    pending = default_storage.save(f'{PENDING_DIR}/{uuid.uuid4().hex}{extension}', upload)
+    profile.picture_pending = pending
+    profile.save(update_fields=['picture_pending'])
+    transaction.on_commit(lambda: schedule(profile.pk, pending))
+    return pending
+
+
+def schedule(profile_id, source):
+    if getattr(settings, 'PROFILE_PICTURE_ASYNC', True):
+        get_executor().submit(_run_job, profile_id, source)
+    else:
+        process_picture(profile_id, source)
+
+
+def _run_job(profile_id, source):
+    try:
+        process_picture(profile_id, source)
+    except Exception:
+        logger.exception('Processing profile picture %s failed', source)
+    finally:
+        close_old_connections()
+
+
+def _flatten(image):
+    """RGB copy of ``image`` with transparency composited onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _store(image, suffix):
+    """Save ``image`` as JPEG under a name derived from its content; identical files are shared."""
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=image.width > 256)
+    content = buffer.getvalue()
+    name = f'{PICTURE_DIR}/{hashlib.sha256(content).hexdigest()[:16]}{suffix}.jpg'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def render_pictures(source):
+    """Downscaled picture and thumbnails for the image stored at ``source``, as ``{field: name}``."""
+    with default_storage.open(source) as handle, Image.open(handle) as original:
+        if original.width * original.height > get_max_pixels():
+            raise InvalidImage('Profile picture has too many pixels')
+        image = _flatten(ImageOps.exif_transpose(original))
+
+    picture = image.copy()
+    picture.thumbnail((get_max_side(), get_max_side()), Image.Resampling.LANCZOS)
+    names = {'profile_picture': _store(picture, '')}
+    for field, size in THUMBNAIL_SIZES.items():
+        names[field] = _store(ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS), f'_{size}')
+    return names
+
+
+def process_picture(profile_id, source, pending=True):
+    """
+    Build the picture and thumbnails from ``source`` and attach them to the
+    profile, unless a newer upload (or a removal) replaced ``source`` in the
+    meantime. Files no longer used by any profile are deleted.
+    """
+    match = {'picture_pending': source} if pending else {'profile_picture': source}
+    try:
+        names = render_pictures(source)
+    except (OSError, InvalidImage, Image.DecompressionBombError) as exc:
+        logger.warning('Discarding profile picture %s: %s', source, exc)
+        Profile.objects.filter(pk=profile_id, **match).update(picture_pending='')
+        if pending:
+            default_storage.delete(source)
+        return None
+
+    with transaction.atomic():
+        profile = Profile.objects.select_for_update().filter(pk=profile_id, **match).first()
+        if profile is None:
+            replaced = list(names.values())
+        else:
+            replaced = [getattr(profile, field).name for field in PICTURE_FIELDS]
+            for field, name in names.items():
+                setattr(profile, field, name)
+            profile.picture_pending = ''
+            profile.save(update_fields=[*PICTURE_FIELDS, 'picture_pending'])
+
+    if pending:
+        default_storage.delete(source)
+    delete_orphans(replaced)
+    return profile
+
+
+def clear_pictures(profile):
+    """Remove the profile's picture, its thumbnails and any pending upload."""
+    old = [getattr(profile, field).name for field in PICTURE_FIELDS]
+    pending = profile.picture_pending
+    for field in PICTURE_FIELDS:
+        setattr(profile, field, None)
+    profile.picture_pending = ''
+    profile.save(update_fields=[*PICTURE_FIELDS, 'picture_pending'])
+    transaction.on_commit(lambda: delete_orphans(old + [pending]))
+
+
+def delete_orphans(names):
+    """Delete the files among ``names`` that no profile references any more."""
+    names = {name for name in names if name}
+    if not names:
+        return []
+    lookup = Q()
+    for field in (*PICTURE_FIELDS, 'picture_pending'):
+        lookup |= Q(**{f'{field}__in': names})
+    used = set()
+    for row in Profile.objects.filter(lookup).values_list(*PICTURE_FIELDS, 'picture_pending'):
+        used.update(row)
+    orphans = sorted(names - used)
+    for name in orphans:
+        default_storage.delete(name)
+    return orphans
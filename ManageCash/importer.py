@@ -0,0 +1,278 @@
+import csv
+from collections import defaultdict
+import io
+import re
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import invalidate
+from .ledger import adjust_balance
+from .money import InvalidAmount, parse_amount as parse_money
+from .reports import apply_day_deltas, local_day
+from .search import deferred_index
+from .models import AddCash, Expense
+
+DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%Y %H:%M', '%Y%m%d%H%M%S', '%Y%m%d')
+INCOME_TYPES = {'income', 'cash', 'credit', 'dep', 'deposit', 'int', 'div'}
+EXPENSE_TYPES = {'expense', 'debit', 'payment', 'pos', 'atm', 'fee', 'srvchg', 'check', 'xfer'}
+SOURCE_MAX_LENGTH = AddCash._meta.get_field('source').max_length
+
+# Columns written per model, after user_id, in the order build_entry returns them
+# (datetime always last).
+IMPORT_FIELDS = {
+    AddCash: ('source', 'amount', 'description', 'datetime'),
+    Expense: ('description', 'amount', 'datetime'),
+}
+AMOUNT_AT = {model: fields.index('amount') for model, fields in IMPORT_FIELDS.items()}
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.cash_count = 0
+        self.expense_count = 0
+        self.errors = []
+
+    @property
+    def created(self):
+        return self.cash_count + self.expense_count
+
+
+def get_batch_size(value=None):
+    return max(1, int(value or getattr(settings, 'TRANSACTION_IMPORT_BATCH_SIZE', 2000)))
+
+
+def parse_amount(value):
+    try:
+        return parse_money(value, allow_negative=True)
+    except InvalidAmount as exc:
+        raise RowError(f'{exc}: {value!r}')
+
+
+def parse_date(value, tz=None):
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        # OFX dates carry an optional fraction and "[offset:TZ]" suffix
+        if value[:8].isdigit():
+            value = re.sub(r'(\.\d+)?(\[.*\])?$', '', value)
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise RowError(f'invalid date {value!r}')
+    if settings.USE_TZ and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz or timezone.get_current_timezone())
+    return parsed
+
+
+def build_entry(row, now=None, parse=parse_date):
+    """
+    Validate one parsed row and return ``(model, values)``, where ``values``
+    holds the row's columns in ``IMPORT_FIELDS[model]`` order minus the user.
+
+    The ``type`` column decides the model; without it a negative amount is
+    an expense and a positive one is income. ``parse`` turns the date column
+    into an aware datetime.
+    """
+    amount = parse_amount(row.get('amount'))
+    kind = (row.get('type') or '').strip().lower()
+    if kind in INCOME_TYPES:
+        is_income = True
+    elif kind in EXPENSE_TYPES:
+        is_income = False
+    elif not kind:
+        is_income = amount > 0
+    else:
+        raise RowError(f'unknown type {kind!r}')
+
+    source = (row.get('source') or '').strip()
+    description = (row.get('description') or '').strip()
+    stamp = parse(row.get('date')) or now or timezone.now()
+    amount = abs(amount)
+
+    if is_income:
+        if not source:
+            raise RowError('source is required for income')
+        if len(source) > SOURCE_MAX_LENGTH:
+            raise RowError('source is too long')
+        return AddCash, (source, amount, description, stamp)
+
+    description = description or source
+    if not description:
+        raise RowError('description is required for expenses')
+    return Expense, (description, amount, stamp)
+
+
+def parse_csv(stream):
+    """Yield ``(line_number, row)`` from a text stream with a header row."""
+    reader = csv.DictReader(stream)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, row
+
+
+_OFX_TAG_RE = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def parse_ofx(stream, chunk_size=64 * 1024):
+    """
+    Yield ``(transaction_number, row)`` for every ``<STMTTRN>`` block of an
+    OFX (SGML or XML) statement, reading the stream a chunk at a time.
+    """
+    buffer = ''
+    current = None
+    number = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Hold back the last tag until the next chunk, its value may continue.
+        cut = max(buffer.rfind('<'), 0) if chunk else len(buffer)
+        for closing, tag, value in _OFX_TAG_RE.findall(buffer[:cut]):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    number += 1
+                    yield number, _ofx_row(current)
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+
+def _ofx_row(fields):
+    amount = fields.get('TRNAMT', '')
+    name, memo = fields.get('NAME') or fields.get('PAYEE', ''), fields.get('MEMO', '')
+    is_income = not amount.strip().startswith('-')
+    return {
+        'type': 'income' if is_income else 'expense',
+        'amount': amount,
+        'date': fields.get('DTPOSTED', ''),
+        'source': name,
+        'description': memo if is_income else ' - '.join(part for part in (name, memo) if part),
+    }
+
+
+def parse_file(stream, filename=''):
+    """Pick the parser from the file extension (``.ofx``/``.qfx`` or CSV)."""
+    if filename.lower().endswith(('.ofx', '.qfx')):
+        return parse_ofx(stream)
+    return parse_csv(stream)
+
+
+def open_text(binary_file):
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', errors='replace', newline='')
+
+
+def _insert(model, user, rows, adapt_datetime=None):
+    """
+    Write a batch with one ``executemany``.
+
+    Building model instances for ``bulk_create`` costs more than SQLite's
+    insert itself, so rows go straight from tuples to the cursor. That skips
+    the models' save signals, so ``import_rows`` invalidates the user's cache
+    itself, and it indexes the new rows for search once the batches are in.
+    """
+    if not rows:
+        return
+    names = IMPORT_FIELDS[model]
+    fields = [model._meta.get_field(name) for name in names]
+    amount_at = names.index('amount')
+    datetime_at = names.index('datetime')
+    adapt_decimal = connection.ops.adapt_decimalfield_value
+    adapt_datetime = adapt_datetime or connection.ops.adapt_datetimefield_value
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in ['user_id'] + [field.column for field in fields])
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+        f'VALUES ({", ".join(["%s"] * (len(fields) + 1))})'
+    )
+    params = []
+    for values in rows:
+        values = list(values)
+        values[amount_at] = adapt_decimal(values[amount_at])
+        values[datetime_at] = adapt_datetime(values[datetime_at])
+        params.append([user.pk, *values])
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def import_rows(user, rows, batch_size=None):
+    """
+    Validate parsed rows and insert them in batches of ``batch_size``.
+
+    Everything happens in one transaction, and the balance ledger and report
+    rollups are adjusted once at the end. Invalid rows are skipped and
+    reported in ``result.errors`` as ``(line_number, message)``.
+    """
+    batch_size = get_batch_size(batch_size)
+    result = ImportResult()
+    batches = {AddCash: [], Expense: []}
+    counts = {AddCash: 0, Expense: 0}
+    totals = {AddCash: Decimal('0'), Expense: Decimal('0')}
+    days = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0, 0])
+    now, tz = timezone.now(), timezone.get_current_timezone()
+    # Statement dates repeat a lot, so parse and convert each distinct one once.
+    parse = lru_cache(maxsize=65536)(partial(parse_date, tz=tz))
+    day_of = lru_cache(maxsize=65536)(partial(local_day, tz=tz))
+    adapt_datetime = lru_cache(maxsize=65536)(connection.ops.adapt_datetimefield_value)
+
+    with transaction.atomic(), deferred_index(AddCash), deferred_index(Expense):
+        for line, row in rows:
+            try:
+                model, values = build_entry(row, now, parse)
+            except RowError as exc:
+                result.errors.append((line, str(exc)))
+                continue
+
+            batch = batches[model]
+            batch.append(values)
+            amount = values[AMOUNT_AT[model]]
+            counts[model] += 1
+            totals[model] += amount
+            day = days[day_of(values[-1])]
+            if model is AddCash:
+                day[0] += amount
+                day[2] += 1
+            else:
+                day[1] += amount
+                day[3] += 1
+            if len(batch) >= batch_size:
+                _insert(model, user, batch, adapt_datetime)
+                batch.clear()
+
+        for model, batch in batches.items():
+            _insert(model, user, batch, adapt_datetime)
+
+        result.cash_count, result.expense_count = counts[AddCash], counts[Expense]
+        if result.created:
+            adjust_balance(
+                user, added=totals[AddCash], spent=totals[Expense],
+                cash_count=result.cash_count, expense_count=result.expense_count,
+            )
+            apply_day_deltas(user, days)
+            # The inserts bypass the model signals that normally do this.
+            transaction.on_commit(lambda: invalidate(user.pk))
+    return result
@@ -0,0 +1,304 @@
+import csv
+import logging
+import os
+import socket
+import tempfile
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .archive import get_batch_size as get_delete_batch_size
+from .caching import deferred_invalidation, invalidate
+from .exporter import day_bound, export_querysets, stream_export
+from .images import PICTURE_FIELDS, delete_orphans
+from .importer import import_rows, open_text, parse_file
+from .ledger import rebuild_balance
+from .models import AddCash, ArchivedCash, ArchivedExpense, Expense, Job, PeriodSummary, Profile
+from .reports import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Relative to JOB_FILES_ROOT (see get_storage)
+UPLOAD_DIR = 'jobs/uploads'
+EXPORT_DIR = 'jobs/exports'
+
+# kind -> handler(job) returning the job's JSON result; see handler()
+HANDLERS = {}
+LABELS = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class JobError(Exception):
+    """A failure retrying will not fix; the job fails at once with this message."""
+
+
+def get_runner():
+    return getattr(settings, 'JOB_RUNNER', 'thread')
+
+
+def get_workers():
+    return getattr(settings, 'JOB_WORKERS', 2)
+
+
+def get_max_attempts():
+    return getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+
+
+def get_retry_delay():
+    return getattr(settings, 'JOB_RETRY_DELAY', 30)
+
+
+def get_timeout():
+    return getattr(settings, 'JOB_TIMEOUT', 30 * 60)
+
+
+def get_keep_days():
+    return getattr(settings, 'JOB_KEEP_DAYS', 7)
+
+
+def get_storage():
+    """
+    Where staged uploads and finished exports live: JOB_FILES_ROOT, outside
+    MEDIA_ROOT, so they are only reachable through the owner-checked
+    download view.
+    """
+    return FileSystemStorage(location=getattr(settings, 'JOB_FILES_ROOT', settings.BASE_DIR / 'private'))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_workers(), thread_name_prefix='jobs')
+    return _executor
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'[:100]
+
+
+def handler(kind, label):
+    """Register ``function(job)`` as the code run for jobs of ``kind``."""
+    def register(function):
+        HANDLERS[kind] = function
+        LABELS[kind] = label
+        return function
+    return register
+
+
+def enqueue(kind, user=None, /, **payload):
+    """
+    Queue a job once the current transaction commits. With JOB_RUNNER
+    'thread' a pool in this process picks it up; with 'worker' it waits for
+    manage.py run_worker; 'inline' runs it right after the commit.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}')
+    job = Job.objects.create(kind=kind, user=user, payload=payload, max_attempts=get_max_attempts())
+    runner = get_runner()
+    if runner == 'thread':
+        transaction.on_commit(kick)
+    elif runner == 'inline':
+        transaction.on_commit(lambda: run_pending(worker_name()))
+    return job
+
+
+def kick(delay=0):
+    """Have the in-process pool run whatever is due, now or after ``delay`` seconds."""
+    if delay:
+        timer = threading.Timer(delay, kick)
+        timer.daemon = True
+        timer.start()
+    else:
+        get_executor().submit(_drain)
+
+
+def _drain():
+    try:
+        run_pending(worker_name())
+    except Exception:
+        logger.exception('Running queued jobs failed')
+    finally:
+        close_old_connections()
+
+
+def claim_next(worker):
+    """
+    Mark the next due job as running for ``worker`` and return it, or
+    ``None``. The conditional UPDATE only succeeds for one of several
+    workers racing for the same row, so no row locks are needed.
+    """
+    while True:
+        now = timezone.now()
+        pk = (
+            Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'pk').values_list('pk', flat=True).first()
+        )
+        if pk is None:
+            return None
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.select_related('user').get(pk=pk)
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome: done, queued again after a back-off, or failed."""
+    try:
+        result = HANDLERS[job.kind](job)
+    except Exception as exc:
+        retry = not isinstance(exc, JobError) and job.attempts < job.max_attempts
+        if isinstance(exc, JobError):
+            message = str(exc)
+        else:
+            logger.exception('Job %s failed (attempt %s of %s)', job.pk, job.attempts, job.max_attempts)
+            message = ''.join(traceback.format_exception_only(exc)).strip()
+        if retry:
+            delay = get_retry_delay() * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, error=message, run_after=timezone.now() + timedelta(seconds=delay),
+            )
+            if get_runner() == 'thread':
+                kick(delay)
+        else:
+            Job.objects.filter(pk=job.pk).update(status=Job.FAILED, error=message, finished_at=timezone.now())
+            _discard_upload(job)
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, result=result, error='', finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker, limit=None):
+    """Claim and run due jobs until none are left (or ``limit`` ran). Returns how many ran."""
+    requeue_stale()
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale():
+    """Put back jobs whose worker died mid-run (running longer than JOB_TIMEOUT)."""
+    cutoff = timezone.now() - timedelta(seconds=get_timeout())
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff)
+    for job in stale:
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(status=Job.QUEUED, error='Worker stopped.')
+        else:
+            Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(
+                status=Job.FAILED, error='Worker stopped.', finished_at=timezone.now(),
+            )
+            _discard_upload(job)
+
+
+def purge_finished(days=None):
+    """Delete jobs finished more than ``days`` (JOB_KEEP_DAYS) ago, and their export files."""
+    cutoff = timezone.now() - timedelta(days=get_keep_days() if days is None else days)
+    old = Job.objects.filter(status__in=(Job.DONE, Job.FAILED), finished_at__lt=cutoff)
+    for result in old.filter(kind='export').values_list('result', flat=True):
+        if result and result.get('file'):
+            get_storage().delete(result['file'])
+    return old.delete()[0]
+
+
+def stage_file(upload):
+    """Store an upload for a job to read later; returns the storage name."""
+    extension = os.path.splitext(upload.name)[1].lower()[:10]
+    return get_storage().save(f'{UPLOAD_DIR}/{uuid.uuid4().hex}{extension}', upload)
+
+
+def _owner(job):
+    if job.user is None:
+        raise JobError('The account no longer exists.')
+    return job.user
+
+
+def _discard_upload(job):
+    if job.payload.get('file'):
+        get_storage().delete(job.payload['file'])
+
+
+@handler('import', 'Statement import')
+def run_import(job):
+    try:
+        with get_storage().open(job.payload['file'], 'rb') as handle:
+            result = import_rows(_owner(job), parse_file(open_text(handle), job.payload['filename']))
+    except csv.Error as exc:
+        raise JobError(f'Could not read the file: {exc}')
+    _discard_upload(job)
+    return {
+        'cash_count': result.cash_count,
+        'expense_count': result.expense_count,
+        'errors': result.errors[:10],
+        'error_count': len(result.errors),
+    }
+
+
+@handler('export', 'Export')
+def run_export(job):
+    payload = job.payload
+    querysets = export_querysets(
+        payload['kind'], _owner(job), payload.get('q', ''),
+        day_bound(payload.get('start')), day_bound(payload.get('end'), end=True),
+    )
+    with tempfile.TemporaryFile() as spool:
+        for piece in stream_export(payload['kind'], querysets, payload['format']):
+            spool.write(piece.encode())
+        spool.seek(0)
+        name = get_storage().save(f'{EXPORT_DIR}/{uuid.uuid4().hex}.{payload["format"]}', File(spool))
+    return {'file': name, 'filename': f'{payload["kind"]}-{timezone.localdate()}.{payload["format"]}'}
+
+
+@handler('rebuild_reports', 'Report rebuild')
+def run_rebuild_reports(job):
+    user = _owner(job)
+    rebuild_balance(user)
+    rebuild_rollups(user)
+    invalidate(user.pk)
+    return {}
+
+
+@handler('delete_account', 'Account deletion')
+def run_delete_account(job):
+    """
+    Delete the user's entries a batch per transaction, so other writers are
+    never locked out for long, then the user. Safe to run again after a
+    partial failure.
+    """
+    user = User.objects.filter(pk=job.payload['user_id']).first()
+    if user is None:
+        return {'deleted': {}}
+    batch_size = get_delete_batch_size()
+    deleted = {}
+    for model in (AddCash, Expense, ArchivedCash, ArchivedExpense, PeriodSummary):
+        deleted[model.__name__] = 0
+        while True:
+            ids = list(model.objects.filter(user=user).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            # The cache is invalidated once with the user below
+            with deferred_invalidation():
+                count, _ = model.objects.filter(pk__in=ids).delete()
+            deleted[model.__name__] += count
+    pictures = list(Profile.objects.filter(user=user).values_list(*PICTURE_FIELDS, 'picture_pending').first() or [])
+    user.delete()
+    invalidate(job.payload['user_id'])
+    delete_orphans(pictures)
+    return {'deleted': deleted}
@@ -0,0 +1,115 @@
+from django.db import transaction
+from django.db.models import F, Count, Q, Value
+from django.utils import timezone
+
+from .models import AddCash, Expense, OpeningBalance, UserBalance
+from .money import CentsSum, MoneySum, to_cents
+
+# Columns read for merged income/expense rows, in UNION order
+ENTRY_FIELDS = ('id', 'amount', 'description', 'datetime')
+
+
+def summarize(queryset, total=MoneySum):
+    """``{'total': ..., 'count': ...}`` of a transaction queryset in one aggregate query."""
+    return queryset.aggregate(total=total('amount'), count=Count('id'))
+
+
+def entries_query(user, limit, filters=None, ascending=False):
+    """
+    UNION ALL of the user's ``limit`` newest (oldest with ``ascending``)
+    incomes and expenses as ``(*ENTRY_FIELDS, source, kind)`` rows, in no
+    particular order. ``filters`` maps ``'cash'``/``'expense'`` to a Q for
+    that side. Each side picks its ids through the (user, -datetime, -id)
+    index.
+    """
+    filters = filters or {}
+    order = ('datetime', 'pk') if ascending else ('-datetime', '-pk')
+
+    def side(model, kind, source):
+        ids = model.objects.for_user(user).filter(filters.get(kind, Q())).order_by(*order).values('pk')[:limit]
+        return (
+            model.objects.filter(pk__in=ids)
+            .annotate(entry_source=source, kind=Value(kind))
+            .values_list(*ENTRY_FIELDS, 'entry_source', 'kind')
+        )
+
+    return side(AddCash, 'cash', F('source')).union(side(Expense, 'expense', Value('')), all=True)
+
+
+def entry_key(row):
+    """Sort key of an entries_query row: datetime, then incomes before expenses, then id."""
+    return row[3], row[-1], row[0]
+
+
+def load_entry(row, user, db):
+    """An AddCash or Expense instance (with ``kind`` set) for an entries_query row."""
+    *values, source, kind = row
+    model = AddCash if kind == 'cash' else Expense
+    loaded = dict(zip(ENTRY_FIELDS, values), source=source, user_id=user.pk)
+    # from_db takes values in the model's field order
+    fields = [field.attname for field in model._meta.concrete_fields if field.attname in loaded]
+    entry = model.from_db(db, fields, [loaded[name] for name in fields])
+    entry.kind = kind
+    return entry
+
+
+def recent_entries(user, limit=5):
+    """The user's newest incomes and expenses as ``(cash, expenses)`` lists, in one query."""
+    rows = entries_query(user, limit)
+    entries = {'cash': [], 'expense': []}
+    # At most 2 * limit rows: sorting here avoids a temp B-tree for the UNION
+    for row in sorted(rows, key=entry_key, reverse=True):
+        entries[row[-1]].append(load_entry(row, user, rows.db))
+    return entries['cash'], entries['expense']
+
+
+def compute_totals(user):
+    """
+    Aggregate a user's totals straight from the raw transaction tables,
+    starting from the opening balance of any archived rows.
+    """
+    cash = summarize(AddCash.objects.filter(user=user), CentsSum)
+    spent = summarize(Expense.objects.filter(user=user), CentsSum)
+    totals = {
+        'added_cents': cash['total'],
+        'spent_cents': spent['total'],
+        'cash_count': cash['count'],
+        'expense_count': spent['count'],
+    }
+    opening = OpeningBalance.objects.filter(user=user).values(*totals).first() or {}
+    return {key: value + opening.get(key, 0) for key, value in totals.items()}
+
+
+def rebuild_balance(user):
+    """Recompute the stored running totals for a user from scratch."""
+    with transaction.atomic():
+        balance, _ = UserBalance.objects.update_or_create(user=user, defaults=compute_totals(user))
+    return balance
+
+
+def get_balance(user):
+    """Return the running totals row, building it from history on first use."""
+    try:
+        return UserBalance.objects.get(user=user)
+    except UserBalance.DoesNotExist:
+        return rebuild_balance(user)
+
+
+def adjust_balance(user, added=0, spent=0, cash_count=0, expense_count=0):
+    """
+    Apply a delta to the user's running totals. ``added`` and ``spent`` are
+    money amounts (Decimal); they are stored as whole cents.
+
+    Call this inside the same transaction as the write it describes, after
+    the write, so a missing row can be rebuilt from tables that already
+    include it.
+    """
+    updated = UserBalance.objects.filter(user=user).update(
+        added_cents=F('added_cents') + to_cents(added),
+        spent_cents=F('spent_cents') + to_cents(spent),
+        cash_count=F('cash_count') + cash_count,
+        expense_count=F('expense_count') + expense_count,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        rebuild_balance(user)
@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.archive import ARCHIVES, archive_user, get_batch_size
+from ManageCash.database import RowsChanged
+from ManageCash.exporter import day_bound
+
+
+class Command(BaseCommand):
+    help = (
+        'Move income and expense entries dated before --before out of the hot tables into '
+        'the archive tables, in batches, adding their totals to each user\'s opening balance. '
+        'Balances and reports stay the same.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help='Archive entries dated before this day (YYYY-MM-DD).')
+        parser.add_argument('--user', help='Only process this username.')
+        parser.add_argument('--batch-size', type=int, help='Rows moved per transaction (default ARCHIVE_BATCH_SIZE).')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived.')
+
+    def handle(self, *args, **options):
+        try:
+            before = day_bound(options['before'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if before is None:
+            raise CommandError('--before must not be empty.')
+
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        batch_size = options['batch_size'] or get_batch_size()
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        totals = dict.fromkeys(ARCHIVES, 0)
+        start = time.perf_counter()
+        for user in users.iterator():
+            if options['dry_run']:
+                moved = {model: model.objects.filter(user=user, datetime__lt=before).count() for model in ARCHIVES}
+            else:
+                try:
+                    moved = archive_user(user, before, batch_size)
+                except RowsChanged as exc:
+                    raise CommandError(f'{user.username}: {exc} Run the command again to finish.')
+            if not any(moved.values()):
+                continue
+            for model, count in moved.items():
+                totals[model] += count
+            self.stdout.write(f"{user.username}: {', '.join(f'{count} {model.__name__}' for model, count in moved.items())}")
+
+        summary = ', '.join(f'{count} {model.__name__}' for model, count in totals.items())
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Would archive {summary} dated before {options["before"]}.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {summary} dated before {options["before"]} in {time.perf_counter() - start:.2f}s.'
+            ))
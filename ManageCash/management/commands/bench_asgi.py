@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from types import ModuleType
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path, reverse
+
+from ManageCash.benchmarks import percentile
+from ManageCash.caching import get_cache
+from ManageCash.urls import READ_VIEWS, build_urlpatterns
+
+# name -> (URL name, query string)
+ENDPOINTS = {
+    'dashboard': ('dashboard', {}),
+    'cash_list': ('cash_list', {}),
+    'expense_list': ('expense_list', {}),
+    'search': ('expense_list', {'q': 'groc'}),
+}
+DUMMY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def _urlconf(async_views):
+    urlconf = ModuleType(f'bench_asgi_urls_{"async" if async_views else "sync"}')
+    urlconf.urlpatterns = [path('', include(build_urlpatterns(async_views)))]
+    return urlconf
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent-request throughput of the read pages under the WSGI handler with '
+        'the sync views (one thread per client) and the ASGI handler with the async views '
+        '(one task per client), on the seed_benchmark_data users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Username prefix used by seed_benchmark_data.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and mode.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Clients in flight at once.')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Disable the per-user cache so every request runs its queries.',
+        )
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith=options['prefix']).order_by('pk'))
+        if not users:
+            raise CommandError(f"No '{options['prefix']}*' users; run seed_benchmark_data first.")
+
+        total, concurrency = options['requests'], max(1, options['concurrency'])
+        overrides = {'CACHES': DUMMY_CACHE} if options['cold'] else {}
+        self.stdout.write(f"{len(READ_VIEWS)} async views, {concurrency} concurrent clients, {total} requests each")
+        for name in options['endpoints']:
+            url_name, params = ENDPOINTS[name]
+            results = {}
+            with override_settings(ROOT_URLCONF=_urlconf(False), **overrides):
+                get_cache().clear()
+                results['wsgi'] = self._wsgi(users, reverse(url_name), params, total, concurrency)
+            with override_settings(ROOT_URLCONF=_urlconf(True), **overrides):
+                get_cache().clear()
+                results['asgi'] = asyncio.run(self._asgi(users, reverse(url_name), params, total, concurrency))
+            for mode, result in results.items():
+                self._print(name, mode, result)
+            if results['wsgi']['throughput_rps']:
+                ratio = results['asgi']['throughput_rps'] / results['wsgi']['throughput_rps']
+                self.stdout.write(f'{name:<13} asgi/wsgi throughput x{ratio:.2f}')
+
+    def _wsgi(self, users, url, params, total, concurrency):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+
+        def worker(index, count):
+            client = Client(raise_request_exception=False)
+            client.force_login(users[index % len(users)])
+            mine, failed = [], 0
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = client.get(url, params)
+                    mine.append(time.perf_counter() - start)
+                    failed += response.status_code >= 400
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(mine)
+                errors[0] += failed
+
+        threads = [
+            threading.Thread(target=worker, args=(i, share))
+            for i, share in enumerate(self._shares(total, concurrency))
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self._summary(latencies, errors[0], time.perf_counter() - start)
+
+    async def _asgi(self, users, url, params, total, concurrency):
+        latencies, errors = [], 0
+
+        async def worker(index, count):
+            nonlocal errors
+            client = AsyncClient(raise_request_exception=False)
+            await client.aforce_login(users[index % len(users)])
+            for _ in range(count):
+                start = time.perf_counter()
+                response = await client.get(url, params)
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(i, share) for i, share in enumerate(self._shares(total, concurrency))
+        ))
+        elapsed = time.perf_counter() - start
+        return self._summary(latencies, errors, elapsed)
+
+    @staticmethod
+    def _shares(total, concurrency):
+        return [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+
+    @staticmethod
+    def _summary(latencies, errors, elapsed):
+        latencies.sort()
+        if not latencies:
+            return {'requests': 0, 'errors': errors, 'throughput_rps': 0}
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        }
+
+    def _print(self, name, mode, result):
+        if not result['requests']:
+            self.stdout.write(self.style.ERROR(f'{name:<13} {mode}  no requests completed'))
+            return
+        line = (
+            f"{name:<13} {mode}  {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.2f} ms  "
+            f"p95 {result['p95_ms']:>7.2f} ms  errors {result['errors']}"
+        )
+        self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
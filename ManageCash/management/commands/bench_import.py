@@ -0,0 +1,50 @@
+import csv
+import random
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from ManageCash.benchmarks import WORDS, throwaway_database
+from ManageCash.importer import get_batch_size, import_rows, open_text, parse_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure CSV import throughput on a synthetic statement. '
+        'Runs on a throwaway SQLite file, never on the real database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000, help='Rows in the synthetic CSV.')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk_create (default TRANSACTION_IMPORT_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with tempfile.TemporaryFile('w+b') as handle:
+            text = open_text(handle)
+            writer = csv.writer(text)
+            writer.writerow(['type', 'amount', 'source', 'description', 'date'])
+            for i in range(options['rows']):
+                income = i % 4 == 0
+                writer.writerow([
+                    'income' if income else 'expense',
+                    f'{rng.randint(1, 500_000) / 100:.2f}',
+                    rng.choice(WORDS) if income else '',
+                    ' '.join(rng.sample(WORDS, 3)),
+                    f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00',
+                ])
+            text.flush()
+            text.seek(0)
+
+            with throwaway_database():
+                user = User.objects.create_user(username='__bench_import__')
+                start = time.perf_counter()
+                result = import_rows(user, parse_csv(text), get_batch_size(options['batch_size']))
+                elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f'{result.created} rows in {elapsed:.2f} s: {result.created / elapsed:,.0f} rows/s '
+            f'({len(result.errors)} errors)'
+        )
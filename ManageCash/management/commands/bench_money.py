@@ -0,0 +1,70 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from ManageCash.benchmarks import synthetic_rows, throwaway_database
+from ManageCash.importer import import_rows
+from ManageCash.models import AddCash
+from ManageCash.money import MoneySum, from_cents, to_cents
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare money totals on synthetic data: plain Sum, the integer-cents MoneySum and '
+        'summing Decimals in Python, against an exact reference. Runs on a throwaway '
+        'SQLite file, never on the real database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Table sizes (entries for the benchmark user) to measure at.',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per method; the best one is reported.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with throwaway_database():
+            user = User.objects.create_user(username='__bench_money__')
+            loaded, exact = 0, 0
+            for rows in sorted(options['rows']):
+                exact += self._load(user, rows - loaded, rng)
+                loaded = rows
+                self._measure(user, rows, from_cents(exact), options['repeat'])
+
+    def _load(self, user, count, rng):
+        """Import ``count`` entries and return their exact total in cents."""
+        total = 0
+
+        def rows():
+            nonlocal total
+            for line, row in synthetic_rows(rng, count, 0, 365):
+                total += to_cents(Decimal(row['amount']))
+                yield line, row
+
+        import_rows(user, rows())
+        return total
+
+    def _measure(self, user, rows, exact, repeat):
+        queryset = AddCash.objects.filter(user=user)
+        methods = {
+            'Sum': lambda: queryset.aggregate(total=Sum('amount'))['total'],
+            'MoneySum': lambda: queryset.aggregate(total=MoneySum('amount'))['total'],
+            'Python': lambda: sum(queryset.values_list('amount', flat=True).iterator(), Decimal('0')),
+        }
+        for name, method in methods.items():
+            best, total = None, None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                total = method()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            error = Decimal(total) - exact
+            style = self.style.SUCCESS if error == 0 and str(total) == str(exact) else self.style.WARNING
+            self.stdout.write(style(
+                f'{rows:>9} rows  {name:<9} {best * 1000:9.2f} ms  total {total}  error {error}'
+            ))
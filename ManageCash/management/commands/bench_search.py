@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from ManageCash.benchmarks import WORDS, throwaway_database
+from ManageCash.models import AddCash, Expense
+from ManageCash.search import fts_available, search
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the cash_list / expense_list search on synthetic data, FTS5 index versus '
+        'the icontains scan. Runs on a throwaway SQLite file, never on the real database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Table sizes (per model, for the benchmark user) to measure at.',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the best one is reported.')
+        parser.add_argument('--term', default='groc', help='Search text to time.')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            if not fts_available(AddCash) or not fts_available(Expense):
+                raise CommandError('The FTS5 search tables are missing; this SQLite build has no FTS5.')
+
+            rng = random.Random(0)
+            user = User.objects.create_user(username='__bench_search__')
+            loaded = 0
+            for rows in sorted(options['rows']):
+                self._load(user, rows - loaded, rng)
+                loaded = rows
+                self._measure(user, rows, options['term'], options['repeat'])
+
+    def _load(self, user, count, rng):
+        while count > 0:
+            size = min(count, BATCH_SIZE)
+            AddCash.objects.bulk_create(
+                AddCash(user=user, source=rng.choice(WORDS), amount=1,
+                        description=' '.join(rng.sample(WORDS, 4)))
+                for _ in range(size)
+            )
+            Expense.objects.bulk_create(
+                Expense(user=user, amount=1, description=' '.join(rng.sample(WORDS, 4)))
+                for _ in range(size)
+            )
+            count -= size
+
+    def _measure(self, user, rows, term, repeat):
+        queries = {
+            'cash icontains': AddCash.objects.for_user(user).filter(
+                Q(source__icontains=term) | Q(description__icontains=term)
+            ),
+            'cash fts5': search(AddCash.objects.for_user(user), term),
+            'expense icontains': Expense.objects.for_user(user).filter(description__icontains=term),
+            'expense fts5': search(Expense.objects.for_user(user), term),
+        }
+        for name, queryset in queries.items():
+            best = min(self._time(queryset) for _ in range(repeat))
+            self.stdout.write(f'{rows:>9} rows  {name:<18} {best * 1000:8.2f} ms')
+
+    def _time(self, queryset):
+        # Count plus the first page, which is what the list view pays for.
+        start = time.perf_counter()
+        queryset.count()
+        list(queryset[:25])
+        return time.perf_counter() - start
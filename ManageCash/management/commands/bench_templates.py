@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from ManageCash.benchmarks import percentile
+from ManageCash.caching import cached, data_version, get_cache
+from ManageCash.views import _dashboard_data
+
+# name -> TEMPLATE_FRAGMENT_TIMEOUT; both use the configured template engine
+SETUPS = {
+    'no fragments': 0,
+    'fragments': 300,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering the dashboard template (base.html navbar included) for a '
+        'seed_benchmark_data user with the configured template engine (Django\'s default '
+        'cached loader), without and with the per-user fragment caches. The dashboard '
+        'data comes from the per-user cache, so only rendering is measured.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Username prefix used by seed_benchmark_data.')
+        parser.add_argument('--renders', type=int, default=500, help='Renders per setup.')
+
+    def handle(self, *args, **options):
+        user = User.objects.select_related('profile').filter(username__startswith=options['prefix']).order_by('pk').first()
+        if user is None:
+            raise CommandError(f"No '{options['prefix']}*' users; run seed_benchmark_data first.")
+
+        request = RequestFactory().get('/')
+        request.user = user
+        get_cache().clear()
+        context = {
+            **cached(user.pk, 'dashboard', lambda: _dashboard_data(user)),
+            'cache_version': data_version(user.pk),
+        }
+
+        results = {}
+        for name, timeout in SETUPS.items():
+            with override_settings(TEMPLATE_FRAGMENT_TIMEOUT=timeout):
+                html = render_to_string('ManageCash/dashboard.html', context, request)
+                timings = []
+                for _ in range(max(1, options['renders'])):
+                    start = time.perf_counter()
+                    render_to_string('ManageCash/dashboard.html', context, request)
+                    timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = sum(timings) / len(timings)
+            self.stdout.write(
+                f'{name:<13} mean {results[name]:6.3f}ms  p50 {percentile(timings, 50):6.3f}ms  '
+                f'p95 {percentile(timings, 95):6.3f}ms  ({len(html)} bytes)'
+            )
+
+        if results['fragments']:
+            self.stdout.write(self.style.SUCCESS(
+                f"fragments: x{results['no fragments'] / results['fragments']:.1f} faster than without"
+            ))
@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from ManageCash.benchmarks import WORDS, throwaway_database
+from ManageCash.database import current_pragmas
+from ManageCash.ledger import compute_totals, get_balance
+from ManageCash.models import Expense
+
+USERNAME = '__concurrency__'
+
+
+class Command(BaseCommand):
+    help = (
+        'Run many parallel add_expense writers while readers load the dashboard, and fail '
+        'on any "database is locked" error or a ledger that no longer matches the rows '
+        'written. Runs on a freshly migrated throwaway SQLite file with the configured '
+        'database profile, never on the real database; expect lock errors unless '
+        'DATABASE_PROFILE=production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Threads posting add_expense.')
+        parser.add_argument('--readers', type=int, default=8, help='Threads loading the dashboard.')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per thread.')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(', '.join(f'{k}={v}' for k, v in current_pragmas(connection).items()))
+            user = User.objects.create_user(username=USERNAME)
+            get_balance(user)
+            # This measures lock contention, not the per-user write rate
+            # limit; replicas would be the real database's copies
+            with override_settings(WRITE_RATE_LIMIT=0, DATABASE_REPLICAS=[]):
+                elapsed, outcomes = self._run(user, options['writers'], options['readers'], options['requests'])
+            self._report(user, options['writers'] * options['requests'], elapsed, outcomes)
+
+    def _run(self, user, writers, readers, requests):
+        outcomes = {'locked': 0, 'failed': 0, 'ok': 0}
+        lock = threading.Lock()
+
+        def worker(index, write):
+            rng = random.Random(index)
+            client = Client()
+            client.force_login(user)
+            mine = dict.fromkeys(outcomes, 0)
+            try:
+                for _ in range(requests):
+                    try:
+                        if write:
+                            response = client.post(reverse('add_expense'), {
+                                'description': ' '.join(rng.sample(WORDS, 3)),
+                                'amount': f'{rng.randint(100, 100_000) / 100:.2f}',
+                            })
+                        else:
+                            response = client.get(reverse('dashboard'))
+                    except OperationalError as exc:
+                        mine['locked' if 'locked' in str(exc) else 'failed'] += 1
+                        continue
+                    mine['failed' if response.status_code >= 400 else 'ok'] += 1
+            finally:
+                connections.close_all()
+            with lock:
+                for key, value in mine.items():
+                    outcomes[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i, True)) for i in range(writers)]
+        threads += [threading.Thread(target=worker, args=(writers + i, False)) for i in range(readers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start, outcomes
+
+    def _report(self, user, expected_writes, elapsed, outcomes):
+        total = sum(outcomes.values())
+        self.stdout.write(
+            f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s): "
+            f"{outcomes['ok']} ok, {outcomes['locked']} locked, {outcomes['failed']} failed"
+        )
+
+        problems = []
+        if outcomes['locked'] or outcomes['failed']:
+            problems.append(f"{outcomes['locked']} lock error(s), {outcomes['failed']} other failure(s)")
+        written = Expense.objects.filter(user=user).count()
+        if written != expected_writes:
+            problems.append(f'{written} of {expected_writes} expenses written')
+        balance = get_balance(user)
+        expected = compute_totals(user)
+        if {key: getattr(balance, key) for key in expected} != expected:
+            problems.append(f'ledger out of sync: expected {expected}')
+
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(problem))
+        if problems:
+            raise CommandError('Concurrent writes failed; try DATABASE_PROFILE=production.')
+        self.stdout.write(self.style.SUCCESS('No lock errors; ledger matches the rows written.'))
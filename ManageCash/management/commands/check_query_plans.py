@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ManageCash.ledger import entries_query
+from ManageCash.models import AddCash, Expense
+from ManageCash.search import search
+from ManageCash.timeline import KINDS, beyond
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN for the dashboard and list view queries and fail '
+        'unless they use the (user, -datetime, -id) indexes without a temp B-tree sort.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plan checks are only implemented for SQLite.')
+
+        # The plan does not depend on the user existing, only on the filter shape.
+        user_id = 1
+        stamp, pk = timezone.now(), 1
+        checks = {
+            'dashboard recent entries': (
+                entries_query(user_id, 5),
+                ('addcash_user_datetime_idx', 'expense_user_datetime_idx'),
+            ),
+            'timeline next page': (
+                entries_query(user_id, 26, {kind: beyond(kind, (stamp, 'cash', pk), False) for kind in KINDS}),
+                ('addcash_user_datetime_idx', 'expense_user_datetime_idx'),
+            ),
+            'timeline previous page': (
+                entries_query(
+                    user_id, 26, {kind: beyond(kind, (stamp, 'cash', pk), True) for kind in KINDS}, ascending=True,
+                ),
+                ('addcash_user_datetime_idx', 'expense_user_datetime_idx'),
+            ),
+            'cash_list': (AddCash.objects.for_user(user_id), 'addcash_user_datetime_idx'),
+            'cash_list search': (
+                search(AddCash.objects.for_user(user_id), 'x'),
+                'addcash_user_datetime_idx',
+            ),
+            'cash_list next page': (
+                AddCash.objects.for_user(user_id)
+                .filter(Q(datetime__lt=stamp) | Q(pk__lt=pk), datetime__lte=stamp)[:26],
+                'addcash_user_datetime_idx',
+            ),
+            'cash_list previous page': (
+                AddCash.objects.for_user(user_id)
+                .filter(Q(datetime__gt=stamp) | Q(pk__gt=pk), datetime__gte=stamp)
+                .order_by('datetime', 'pk')[:26],
+                'addcash_user_datetime_idx',
+            ),
+            'expense_list': (Expense.objects.for_user(user_id), 'expense_user_datetime_idx'),
+            'expense_list search': (
+                search(Expense.objects.for_user(user_id), 'x'),
+                'expense_user_datetime_idx',
+            ),
+        }
+
+        failures = 0
+        for name, (queryset, index_names) in checks.items():
+            plan = queryset.explain()
+            problems = []
+            for index_name in [index_names] if isinstance(index_names, str) else index_names:
+                if index_name not in plan:
+                    problems.append(f'does not use {index_name}')
+            if 'TEMP B-TREE' in plan:
+                problems.append('sorts with a temp B-tree')
+
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'{name}: {", ".join(problems)}'))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{failures} query plan(s) failed.')
@@ -0,0 +1,102 @@
+import os
+import uuid
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from ManageCash.benchmarks import throwaway_database
+from ManageCash.ledger import rebuild_balance
+from ManageCash.middleware import ReplicaMiddleware
+from ManageCash.routers import get_replicas
+
+USERNAME = '__replica_check__'
+
+
+class Command(BaseCommand):
+    help = (
+        'Check read/write routing against the configured replicas: pages read from a replica, '
+        'writes go to the primary, and the page after a write reads from the primary and '
+        'shows it. Runs on throwaway SQLite files standing in for the primary and each '
+        'replica, never on the real databases.'
+    )
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICAS to one or more file paths.')
+        if connection.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in replicas):
+            raise CommandError('check_replica_routing copies SQLite files; the databases are not all SQLite.')
+
+        replica_names = {alias: connections[alias].settings_dict['NAME'] for alias in replicas}
+        with throwaway_database() as directory:
+            try:
+                for alias in replicas:
+                    connections[alias].close()
+                    connections[alias].settings_dict['NAME'] = os.path.join(directory, f'{alias}.sqlite3')
+                # A throwaway cache too, so the new user's id can't pick up a
+                # real user's cached pages
+                with override_settings(CACHES={'default': {
+                    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'LOCATION': 'check_replica_routing',
+                }}):
+                    user = User.objects.create_user(username=USERNAME)
+                    rebuild_balance(user)
+                    call_command('sync_replicas', stdout=self.stdout)
+                    failures = self._check(user, replicas)
+            finally:
+                for alias, name in replica_names.items():
+                    connections[alias].close()
+                    connections[alias].settings_dict['NAME'] = name
+
+        for failure in failures:
+            self.stdout.write(self.style.ERROR(failure))
+        if failures:
+            raise CommandError(f'{len(failures)} routing check(s) failed.')
+        self.stdout.write(self.style.SUCCESS('Reads use the replicas; writes and read-your-writes use the primary.'))
+
+    def _check(self, user, replicas):
+        client = Client()
+        client.force_login(user)
+        marker = f'replica check {uuid.uuid4().hex[:8]}'
+        failures = []
+
+        queries, response = self._request(client.get, reverse('expense_list'))
+        if not sum(queries[alias] for alias in replicas):
+            failures.append('expense_list: no queries went to a replica')
+
+        queries, response = self._request(client.post, reverse('add_expense'), {'description': marker, 'amount': '1.00'})
+        if any(queries[alias] for alias in replicas):
+            failures.append('add_expense: queried a replica while writing')
+        if ReplicaMiddleware.cookie_name not in response.cookies:
+            failures.append('add_expense: no read-your-writes cookie set')
+
+        queries, response = self._request(client.get, reverse('expense_list'))
+        if any(queries[alias] for alias in replicas):
+            failures.append('expense_list after a write: read from a replica')
+        if marker not in response.content.decode():
+            failures.append('expense_list after a write: new expense missing')
+
+        client.cookies.pop(ReplicaMiddleware.cookie_name, None)
+        queries, response = self._request(client.get, reverse('expense_list'))
+        if not sum(queries[alias] for alias in replicas):
+            failures.append('expense_list after the sticky window: no queries went to a replica')
+        for alias in (DEFAULT_DB_ALIAS, *replicas):
+            self.stdout.write(f'{alias}: {queries[alias]} queries on the last request')
+        return failures
+
+    def _request(self, method, *args):
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in (DEFAULT_DB_ALIAS, *get_replicas())
+            }
+            response = method(*args)
+        if response.status_code >= 400:
+            raise CommandError(f'{args[0]}: status {response.status_code}')
+        return {alias: len(queries) for alias, queries in captured.items()}, response
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = 'Create a JSON API token for a user and print its key (it cannot be shown again).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help='Label to tell the user\'s tokens apart.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        _, key = ApiToken.generate(user, options['name'])
+        self.stdout.write(self.style.SUCCESS(f'Created a token for {user.username}:'))
+        self.stdout.write(key)
@@ -0,0 +1,41 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.exporter import CONTENT_TYPES, EXPORT_KINDS, day_bound, export_querysets, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Dump a user's income or expense entries as CSV or JSON, streamed in chunks. "
+        'Archived entries are included when the range reaches back to them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('kind', choices=sorted(EXPORT_KINDS))
+        parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='csv')
+        parser.add_argument('--search', default='', help='Same text search as the list pages.')
+        parser.add_argument('--start', help='First day to include (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last day to include (YYYY-MM-DD).')
+        parser.add_argument('--output', help='File to write; defaults to stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        try:
+            start = day_bound(options['start'])
+            end = day_bound(options['end'], end=True)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        querysets = export_querysets(options['kind'], user, options['search'], start, end)
+        pieces = stream_export(options['kind'], querysets, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as handle:
+                handle.writelines(pieces)
+        else:
+            sys.stdout.writelines(pieces)
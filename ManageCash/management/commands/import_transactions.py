@@ -0,0 +1,44 @@
+import csv
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.importer import get_batch_size, import_rows, open_text, parse_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a CSV (type, amount, source, description, date) or OFX statement '
+        'for a user, streaming the file and writing in batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk_create (default TRANSACTION_IMPORT_BATCH_SIZE).')
+        parser.add_argument(
+            '--format', choices=['csv', 'ofx'],
+            help='File format; guessed from the extension when omitted.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        name = options['path'] if not options['format'] else f"file.{options['format']}"
+        try:
+            with open(options['path'], 'rb') as handle:
+                result = import_rows(
+                    user, parse_file(open_text(handle), name), get_batch_size(options['batch_size'])
+                )
+        except (OSError, csv.Error) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors:
+            self.stdout.write(self.style.WARNING(f'line {line}: {message}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.cash_count} income and {result.expense_count} expense '
+            f'entries; {len(result.errors)} row(s) skipped.'
+        ))
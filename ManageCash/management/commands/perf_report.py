@@ -0,0 +1,69 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = 'Summarise the slow-request log written by PerformanceMiddleware: p50/p95/p99 per view.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Log file to read (default PERF_SLOW_LOG).')
+        parser.add_argument('--sql', type=int, default=0, help='Also list the N slowest statements seen per view.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or getattr(settings, 'PERF_SLOW_LOG', None)
+        if not path:
+            raise CommandError('No log path given and PERF_SLOW_LOG is not set.')
+
+        views = defaultdict(list)
+        skipped = 0
+        try:
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    views[entry.get('view') or entry.get('path')].append(entry)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        if not views:
+            self.stdout.write('No requests logged.')
+            return
+
+        header = f'{"view":<24} {"count":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8} {"sql ms":>8} {"tpl ms":>8}'
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        rows = []
+        for view, entries in views.items():
+            totals = sorted(entry['total_ms'] for entry in entries)
+            rows.append((
+                percentile(totals, 95), view, len(entries), percentile(totals, 50), percentile(totals, 99),
+                sum(entry['queries'] for entry in entries) / len(entries),
+                sum(entry['sql_ms'] for entry in entries) / len(entries),
+                sum(entry['template_ms'] for entry in entries) / len(entries),
+            ))
+        for p95, view, count, p50, p99, queries, sql_ms, tpl_ms in sorted(rows, key=lambda row: row[0], reverse=True):
+            self.stdout.write(
+                f'{str(view):<24} {count:>6} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} '
+                f'{queries:>8.1f} {sql_ms:>8.1f} {tpl_ms:>8.1f}'
+            )
+
+        if options['sql']:
+            for view, entries in views.items():
+                statements = sorted(
+                    (query for entry in entries for query in entry.get('worst_sql', [])),
+                    key=lambda query: query['ms'], reverse=True,
+                )
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{view}'))
+                for query in statements[:options['sql']]:
+                    self.stdout.write(f'{query["ms"]:>9.1f} ms  {query["sql"]}')
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'{skipped} unreadable line(s) skipped.'))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ManageCash.images import PENDING_DIR, PICTURE_DIR, delete_orphans, process_picture
+from ManageCash.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the downscaled picture and thumbnails for profiles that have none yet '
+        '(pictures uploaded before thumbnails existed), and optionally delete unused files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cleanup', action='store_true',
+            help='Also delete picture files no profile references (pending uploads after an hour).',
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(Q(profile_picture='') | Q(profile_picture=None)).filter(
+            Q(thumbnail_small='') | Q(thumbnail_small=None),
+        )
+        processed = 0
+        for profile in profiles.iterator():
+            if process_picture(profile.pk, profile.profile_picture.name, pending=False):
+                processed += 1
+            else:
+                self.stdout.write(self.style.WARNING(f'{profile}: picture could not be processed'))
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} profile picture(s).'))
+
+        if options['cleanup']:
+            deleted = self._cleanup()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {len(deleted)} unused file(s).'))
+
+    def _cleanup(self):
+        names = []
+        for directory in (PICTURE_DIR, PENDING_DIR):
+            try:
+                files = default_storage.listdir(directory)[1]
+            except FileNotFoundError:
+                continue
+            for filename in files:
+                name = f'{directory}/{filename}'
+                # A recent pending upload may still be waiting for its worker
+                if directory == PENDING_DIR and time.time() - default_storage.get_modified_time(name).timestamp() < 3600:
+                    continue
+                names.append(name)
+        return delete_orphans(names)
@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.caching import invalidate
+from ManageCash.ledger import compute_totals, rebuild_balance
+from ManageCash.models import UserBalance
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the per-user running balance ledger from the raw transaction tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only process this username.')
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Compare stored totals with the raw tables without changing anything.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        stored = {b.user_id: b for b in UserBalance.objects.filter(user__in=users)}
+        mismatches = 0
+        for user in users.iterator():
+            if not options['verify']:
+                rebuild_balance(user)
+                # Cached pages and ETags still reflect the old totals
+                invalidate(user.pk)
+                continue
+
+            expected = compute_totals(user)
+            balance = stored.get(user.pk)
+            actual = {key: getattr(balance, key) for key in expected} if balance else None
+            if actual != expected:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(
+                    f'{user.username}: stored {actual}, expected {expected}'
+                ))
+
+        if options['verify']:
+            if mismatches:
+                raise CommandError(f'{mismatches} balance(s) out of sync.')
+            self.stdout.write(self.style.SUCCESS('All balances match the raw tables.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt balances for {users.count()} user(s).'))
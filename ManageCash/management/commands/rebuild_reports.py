@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.caching import invalidate
+from ManageCash.jobs import enqueue
+from ManageCash.models import PeriodSummary
+from ManageCash.reports import SUMMARY_FIELDS, compute_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the daily/weekly/monthly report rollups from the raw transaction tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only process this username.')
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Compare stored rollups with the raw tables without changing anything.',
+        )
+        parser.add_argument(
+            '--background', action='store_true',
+            help='Queue one job per user (which also rebuilds its balance) instead of rebuilding here.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options['background']:
+            if options['verify']:
+                raise CommandError('--background and --verify cannot be combined.')
+            jobs = [enqueue('rebuild_reports', user) for user in users.iterator()]
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(jobs)} rebuild job(s).'))
+            return
+
+        mismatches = 0
+        for user in users.iterator():
+            if not options['verify']:
+                rebuild_rollups(user)
+                # Cached pages and ETags still reflect the old totals
+                invalidate(user.pk)
+                continue
+
+            def key(summary):
+                return summary.period, summary.start
+
+            def values(summary):
+                return tuple(getattr(summary, field) for field in SUMMARY_FIELDS)
+
+            expected = {key(s): values(s) for s in compute_rollups(user)}
+            # Buckets emptied by deletes stay behind as zero rows; they are harmless.
+            actual = {
+                key(s): values(s) for s in PeriodSummary.objects.filter(user=user)
+                if any(values(s))
+            }
+            if actual != expected:
+                mismatches += 1
+                self.stdout.write(self.style.WARNING(
+                    f'{user.username}: {len(set(actual.items()) ^ set(expected.items()))} bucket(s) differ'
+                ))
+
+        if options['verify']:
+            if mismatches:
+                raise CommandError(f'{mismatches} user(s) with rollups out of sync.')
+            self.stdout.write(self.style.SUCCESS('All rollups match the raw tables.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {users.count()} user(s).'))
@@ -0,0 +1,150 @@
+import json
+import random
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ManageCash.benchmarks import WORDS, percentile
+
+# name -> (method, URL name, request data factory)
+ENDPOINTS = {
+    'dashboard': ('get', 'dashboard', lambda rng: None),
+    'cash_list': ('get', 'cash_list', lambda rng: None),
+    'expense_list': ('get', 'expense_list', lambda rng: None),
+    'search': ('get', 'expense_list', lambda rng: {'q': rng.choice(WORDS)[:4]}),
+    'add_cash': ('post', 'add_cash', lambda rng: {
+        'source': rng.choice(WORDS), 'amount': f'{rng.randint(100, 100_000) / 100:.2f}',
+    }),
+    'add_expense': ('post', 'add_expense', lambda rng: {
+        'description': ' '.join(rng.sample(WORDS, 3)), 'amount': f'{rng.randint(100, 100_000) / 100:.2f}',
+    }),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the main pages through the test client as the seed_benchmark_data users and report '
+        'throughput and latency per endpoint. Writes (add_cash/add_expense) go to those users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Username prefix used by seed_benchmark_data.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--threads', type=int, default=1, help='Concurrent clients per endpoint.')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--output', help='Save the results as JSON here.')
+        parser.add_argument('--baseline', help='Earlier JSON results to compare against.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Flag a regression when p95 grows or throughput drops by more than this fraction.',
+        )
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__startswith=options['prefix']).order_by('pk'))
+        if not users:
+            raise CommandError(f"No '{options['prefix']}*' users; run seed_benchmark_data first.")
+
+        results = {}
+        # Writes are timed as fast as they go, not as the write rate limit allows
+        with override_settings(WRITE_RATE_LIMIT=0):
+            for name in options['endpoints']:
+                results[name] = self._run(name, users, options['requests'], max(1, options['threads']))
+                self._print(name, results[name])
+
+        report = {
+            'time': timezone.now().isoformat(),
+            'requests': options['requests'],
+            'threads': options['threads'],
+            'users': len(users),
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Saved results to {options['output']}")
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+    def _run(self, name, users, total, threads):
+        method, url_name, make_data = ENDPOINTS[name]
+        url = reverse(url_name)
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker(index, count):
+            rng = random.Random(index)
+            client = Client(raise_request_exception=False)
+            client.force_login(users[index % len(users)])
+            mine, failed = [], 0
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = getattr(client, method)(url, make_data(rng))
+                    mine.append(time.perf_counter() - start)
+                    failed += response.status_code >= 400
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        shares = [total // threads + (i < total % threads) for i in range(threads)]
+        workers = [threading.Thread(target=worker, args=(i, share)) for i, share in enumerate(shares)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        if not latencies:
+            return {'requests': 0, 'errors': sum(errors)}
+        return {
+            'requests': len(latencies),
+            'errors': sum(errors),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        }
+
+    def _print(self, name, result):
+        if not result['requests']:
+            self.stdout.write(self.style.ERROR(f'{name:<13} no requests completed'))
+            return
+        line = (
+            f"{name:<13} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.2f} ms  "
+            f"p95 {result['p95_ms']:>7.2f} ms  errors {result['errors']}"
+        )
+        self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
+
+    def _compare(self, results, path, tolerance):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                baseline = json.load(handle)['endpoints']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before or not result['requests'] or not before.get('requests'):
+                continue
+            if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+            if result['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{name}: throughput {before['throughput_rps']} -> {result['throughput_rps']} req/s")
+
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {path}.')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}.'))
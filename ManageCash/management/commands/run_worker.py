@@ -0,0 +1,73 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from ManageCash.jobs import get_workers, purge_finished, run_pending, worker_name
+
+# Seconds between purges of old finished jobs
+PURGE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued jobs (imports, background exports, report rebuilds, account deletions) '
+        'on a pool of threads, polling the Job table. Run with JOB_RUNNER=worker so the web '
+        'processes leave jobs to it; several workers can share one database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, help='Worker threads (default JOB_WORKERS).')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to wait when nothing is due.')
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due, then exit.')
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or get_workers()
+        if threads < 1:
+            raise CommandError('--threads must be at least 1.')
+
+        purged = purge_finished()
+        if purged:
+            self.stdout.write(f'Purged {purged} old job(s).')
+
+        if options['once']:
+            count = run_pending(worker_name())
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} job(s).'))
+            return
+
+        stop = threading.Event()
+        counts = [0] * threads
+
+        def work(index):
+            try:
+                while not stop.is_set():
+                    ran = run_pending(worker_name())
+                    counts[index] += ran
+                    close_old_connections()
+                    if not ran:
+                        stop.wait(options['poll'])
+            finally:
+                connection.close()
+
+        pool = [
+            threading.Thread(target=work, args=(index,), name=f'worker-{index + 1}', daemon=True)
+            for index in range(threads)
+        ]
+        for thread in pool:
+            thread.start()
+        self.stdout.write(f'{threads} worker thread(s) running; Ctrl-C to stop after the current jobs.')
+
+        last_purge = time.monotonic()
+        try:
+            while any(thread.is_alive() for thread in pool):
+                stop.wait(options['poll'])
+                if time.monotonic() - last_purge > PURGE_EVERY:
+                    purge_finished()
+                    last_purge = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping; waiting for running jobs to finish...'))
+        stop.set()
+        for thread in pool:
+            thread.join()
+        self.stdout.write(self.style.SUCCESS(f'Ran {sum(counts)} job(s).'))
@@ -0,0 +1,60 @@
+import random
+import secrets
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ManageCash.benchmarks import synthetic_rows
+from ManageCash.importer import get_batch_size, import_rows
+from ManageCash.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Create benchmark users (<prefix>1, <prefix>2, ...) with synthetic income and expense '
+        'entries, written through the bulk import path so balances, rollups and search stay in sync.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--cash', type=int, default=1000, help='Income entries per user.')
+        parser.add_argument('--expenses', type=int, default=5000, help='Expense entries per user.')
+        parser.add_argument('--days', type=int, default=5 * 365, help='Spread entries over this many past days.')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', help='Password for every user (default: a random one, printed at the end).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data sets.')
+        parser.add_argument('--batch-size', type=int, help='Rows per insert (default TRANSACTION_IMPORT_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users starting with '{prefix}' already exist; pick another --prefix.")
+
+        # Never a well-known default: the users are real accounts on this database
+        plain_password = options['password'] or secrets.token_urlsafe(12)
+        # One hash for everyone instead of a full PBKDF2 run per user
+        password = make_password(plain_password)
+        users = User.objects.bulk_create(
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password)
+            for i in range(1, options['users'] + 1)
+        )
+        users = list(User.objects.filter(username__in=[user.username for user in users]).order_by('pk'))
+        Profile.objects.bulk_create(Profile(user=user) for user in users)
+
+        rng = random.Random(options['seed'])
+        batch_size = get_batch_size(options['batch_size'])
+        start = time.perf_counter()
+        rows = 0
+        for user in users:
+            result = import_rows(
+                user, synthetic_rows(rng, options['cash'], options['expenses'], options['days']), batch_size,
+            )
+            rows += result.created
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} user(s) and {rows} entries in {elapsed:.1f} s '
+            f"(password '{plain_password}')."
+        ))
@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from ManageCash.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into every DATABASE_REPLICAS file, standing in '
+        'for replication when trying the read-replica setup locally.'
+    )
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICAS to one or more file paths.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite' or any(connections[alias].vendor != 'sqlite' for alias in replicas):
+            raise CommandError("Only SQLite replicas can be synced here; use the database's own replication.")
+
+        source = sqlite3.connect(primary.settings_dict['NAME'])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"{alias}: copied to {connections[alias].settings_dict['NAME']}")
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f'Synced {len(replicas)} replica(s).'))
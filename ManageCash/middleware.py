@@ -0,0 +1,204 @@
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+from .routers import allow_replica_reads, get_replicas, get_sticky_seconds, reset_replica_reads
+
+logger = logging.getLogger('ManageCash.slow_requests')
+
+_current = ContextVar('perf_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = []
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, duration in self.queries)
+
+
+def _timed_render(render):
+    """Wrap Template.render so only the outermost render of a request is timed."""
+    def wrapper(self, context):
+        stats = _current.get()
+        if stats is None or stats.template_depth:
+            return render(self, context)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            stats.template_time += time.perf_counter() - start
+            stats.template_depth -= 1
+    return wrapper
+
+
+# Template.render before timed_templates() wrapped it, and how many measured
+# requests are using the wrapper
+_original_render = None
+_render_users = 0
+_render_lock = threading.Lock()
+
+
+@contextmanager
+def timed_templates():
+    """
+    Time template rendering for the block. Template.render is wrapped only
+    while at least one measured request runs and restored after the last
+    one, so management commands and tests never see the wrapper.
+    """
+    global _original_render, _render_users
+    with _render_lock:
+        if not _render_users:
+            _original_render = Template.render
+            Template.render = _timed_render(_original_render)
+        _render_users += 1
+    try:
+        yield
+    finally:
+        with _render_lock:
+            _render_users -= 1
+            if not _render_users:
+                Template.render = _original_render
+
+
+def _record(stats):
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.queries.append((sql, time.perf_counter() - start))
+    return wrapper
+
+
+@contextmanager
+def recording_queries():
+    """
+    Count this thread's queries towards the request PerformanceMiddleware is
+    measuring, if any. Execute wrappers only cover the connections of the
+    thread that installs them, so work a request hands to worker threads
+    (see concurrency.run_concurrently) enters this there as well.
+    """
+    stats = _current.get()
+    with ExitStack() as stack:
+        if stats is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_record(stats)))
+        yield
+
+
+class PerformanceMiddleware:
+    """
+    Opt-in per-request instrumentation: query count, SQL time, template
+    render time and wall time. Adds a ``Server-Timing`` header and logs
+    requests slower than PERF_SLOW_REQUEST_MS, with their slowest SQL, to
+    the ``ManageCash.slow_requests`` logger as one JSON object per line.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with recording_queries(), timed_templates():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{len(stats.queries)} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        if total * 1000 >= getattr(settings, 'PERF_SLOW_REQUEST_MS', 500):
+            self._log(request, response, stats, total)
+        return response
+
+    @staticmethod
+    def _log(request, response, stats, total):
+        match = request.resolver_match
+        worst = sorted(stats.queries, key=lambda query: query[1], reverse=True)
+        logger.warning(json.dumps({
+            'time': timezone.now().isoformat(),
+            'view': match.url_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(stats.sql_time * 1000, 2),
+            'template_ms': round(stats.template_time * 1000, 2),
+            'queries': len(stats.queries),
+            'worst_sql': [
+                {'sql': sql, 'ms': round(duration * 1000, 2)}
+                for sql, duration in worst[:getattr(settings, 'PERF_SLOW_LOG_SQL', 5)]
+            ],
+        }))
+
+
+class ReplicaMiddleware:
+    """
+    Let GET/HEAD requests read ManageCash data from a replica (see
+    ReplicaRouter). After a request writes, a short-lived cookie keeps that
+    browser on the primary for REPLICA_STICKY_SECONDS, so the redirect after
+    adding an entry shows it even if the replicas lag behind.
+    """
+
+    cookie_name = 'cm_primary'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+
+        tokens = allow_replica_reads(self._allowed(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = reset_replica_reads(tokens)
+        return self._stick(response, wrote)
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+
+        tokens = allow_replica_reads(self._allowed(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = reset_replica_reads(tokens)
+        return self._stick(response, wrote)
+
+    def _allowed(self, request):
+        return request.method in ('GET', 'HEAD') and self.cookie_name not in request.COOKIES
+
+    def _stick(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=get_sticky_seconds(), httponly=True, samesite='Lax',
+            )
+        return response
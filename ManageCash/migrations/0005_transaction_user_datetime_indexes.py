@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0004_userbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='addcash',
+            index=models.Index(fields=['user', '-datetime'], name='addcash_user_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-datetime'], name='expense_user_datetime_idx'),
+        ),
+    ]
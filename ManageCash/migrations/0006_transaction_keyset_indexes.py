@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0005_transaction_user_datetime_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='addcash',
+            name='addcash_user_datetime_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_user_datetime_idx',
+        ),
+        migrations.AddIndex(
+            model_name='addcash',
+            index=models.Index(fields=['user', '-datetime', '-id'], name='addcash_user_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-datetime', '-id'], name='expense_user_datetime_idx'),
+        ),
+    ]
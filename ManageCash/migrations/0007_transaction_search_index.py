@@ -0,0 +1,66 @@
+from django.db import migrations, OperationalError
+
+# External-content FTS5 tables over the transaction text columns, kept in
+# sync by triggers so every write path (views, admin, bulk_create) is covered.
+SEARCH_TABLES = {
+    'ManageCash_addcash': ('ManageCash_addcash_fts', ['source', 'description']),
+    'ManageCash_expense': ('ManageCash_expense_fts', ['description']),
+}
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to icontains.
+            return
+
+        for source, (table, columns) in SEARCH_TABLES.items():
+            cols = ', '.join(columns)
+            new = ', '.join(f'new.{c}' for c in columns)
+            old = ', '.join(f'old.{c}' for c in columns)
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE "{table}" USING fts5({cols}, '
+                f"content='{source}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_ai" AFTER INSERT ON "{source}" BEGIN '
+                f'INSERT INTO "{table}"(rowid, {cols}) VALUES (new.id, {new}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_ad" AFTER DELETE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_au" AFTER UPDATE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {cols}) VALUES ('delete', old.id, {old}); "
+                f'INSERT INTO "{table}"(rowid, {cols}) VALUES (new.id, {new}); END'
+            )
+            cursor.execute(f"INSERT INTO \"{table}\"(\"{table}\") VALUES ('rebuild')")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for table, _ in SEARCH_TABLES.values():
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS "{table}_{suffix}"')
+            cursor.execute(f'DROP TABLE IF EXISTS "{table}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0006_transaction_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
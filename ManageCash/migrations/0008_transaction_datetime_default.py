@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# SQLite rebuilds both tables to alter the columns, which drops the FTS sync
+# triggers 0007 created on them; they are put back afterwards.
+SEARCH_TABLES = {
+    'ManageCash_addcash': ('ManageCash_addcash_fts', ['source', 'description']),
+    'ManageCash_expense': ('ManageCash_expense_fts', ['description']),
+}
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        names = {row[0] for row in cursor.fetchall()}
+        for source, (table, columns) in SEARCH_TABLES.items():
+            # No FTS5 table (SQLite without FTS5), or the triggers survived
+            if table not in names or f'{table}_ai' in names:
+                continue
+            cols = ', '.join(columns)
+            new = ', '.join(f'new.{c}' for c in columns)
+            old = ', '.join(f'old.{c}' for c in columns)
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_ai" AFTER INSERT ON "{source}" BEGIN '
+                f'INSERT INTO "{table}"(rowid, {cols}) VALUES (new.id, {new}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_ad" AFTER DELETE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER "{table}_au" AFTER UPDATE ON "{source}" BEGIN '
+                f"INSERT INTO \"{table}\"(\"{table}\", rowid, {cols}) VALUES ('delete', old.id, {old}); "
+                f'INSERT INTO "{table}"(rowid, {cols}) VALUES (new.id, {new}); END'
+            )
+            # The rebuild keeps every row's id, so the index itself is still accurate
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0007_transaction_search_index'),
+    ]
+
+    operations = [
+        # Unapplying rebuilds the tables again; this runs last in that direction
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AlterField(
+            model_name='addcash',
+            name='datetime',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='datetime',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
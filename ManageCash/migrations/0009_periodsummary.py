@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+
+def build_summaries(apps, schema_editor):
+    AddCash = apps.get_model('ManageCash', 'AddCash')
+    Expense = apps.get_model('ManageCash', 'Expense')
+    PeriodSummary = apps.get_model('ManageCash', 'PeriodSummary')
+
+    buckets = {}
+    for period, trunc in (('day', TruncDay), ('week', TruncWeek), ('month', TruncMonth)):
+        for model, total_field, count_field in (
+            (AddCash, 'total_added', 'cash_count'),
+            (Expense, 'total_spent', 'expense_count'),
+        ):
+            rows = (
+                model.objects.annotate(start=trunc('datetime', output_field=DateField()))
+                .order_by()
+                .values('user_id', 'start')
+                .annotate(total=Sum('amount'), count=Count('id'))
+            )
+            for row in rows:
+                key = (row['user_id'], period, row['start'])
+                summary = buckets.setdefault(
+                    key, PeriodSummary(user_id=key[0], period=period, start=key[2])
+                )
+                setattr(summary, total_field, row['total'])
+                setattr(summary, count_field, row['count'])
+    PeriodSummary.objects.bulk_create(buckets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0008_transaction_datetime_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Daily'), ('week', 'Weekly'), ('month', 'Monthly')], max_length=5)),
+                ('start', models.DateField()),
+                ('total_added', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cash_count', models.IntegerField(default=0)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'start'), name='periodsummary_user_period_start_uniq')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+
+def to_cents(apps, schema_editor):
+    for name in ('UserBalance', 'PeriodSummary'):
+        apps.get_model('ManageCash', name).objects.update(
+            added_cents=Cast(Round(F('total_added') * 100), BigIntegerField()),
+            spent_cents=Cast(Round(F('total_spent') * 100), BigIntegerField()),
+        )
+
+
+def from_cents(apps, schema_editor):
+    for name in ('UserBalance', 'PeriodSummary'):
+        model = apps.get_model('ManageCash', name)
+        rows = list(model.objects.only('added_cents', 'spent_cents'))
+        for row in rows:
+            row.total_added = Decimal(row.added_cents) / 100
+            row.total_spent = Decimal(row.spent_cents) / 100
+        model.objects.bulk_update(rows, ['total_added', 'total_spent'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0009_periodsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userbalance',
+            name='added_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userbalance',
+            name='spent_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='periodsummary',
+            name='added_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='periodsummary',
+            name='spent_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(to_cents, from_cents),
+        migrations.RemoveField(
+            model_name='userbalance',
+            name='total_added',
+        ),
+        migrations.RemoveField(
+            model_name='userbalance',
+            name='total_spent',
+        ),
+        migrations.RemoveField(
+            model_name='periodsummary',
+            name='total_added',
+        ),
+        migrations.RemoveField(
+            model_name='periodsummary',
+            name='total_spent',
+        ),
+    ]
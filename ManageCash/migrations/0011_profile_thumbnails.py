@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ManageCash', '0010_money_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='picture_pending',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_large',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail_small',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+    ]
@@ -1,11 +1,22 @@
 
+import hashlib
+import secrets
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .money import from_cents
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Square renditions of profile_picture (48px navbar, 256px profile page)
+    thumbnail_small = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    thumbnail_large = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Upload waiting to be processed in the background, if any
+    picture_pending = models.CharField(max_length=255, blank=True)
     bio = models.TextField(blank=True, max_length=500)
     phone = models.CharField(max_length=20, blank=True)
     
@@ -15,17 +26,226 @@ class Profile(models.Model):
     @property
     def has_profile_picture(self):
         return bool(self.profile_picture and hasattr(self.profile_picture, 'url'))
+    
+    @property
+    def small_picture_url(self):
+        return (self.thumbnail_small or self.profile_picture).url
+    
+    @property
+    def large_picture_url(self):
+        return (self.thumbnail_large or self.profile_picture).url
+
+
+class TransactionQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """A user's entries, newest first (served by the (user, -datetime, -id) index)."""
+        return self.filter(user=user).order_by('-datetime', '-pk')
 
 
 class AddCash(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     source = models.CharField(max_length=255)
-    datetime = models.DateTimeField(auto_now_add=True)
+    datetime = models.DateTimeField(default=timezone.now, editable=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-datetime', '-id'], name='addcash_user_datetime_idx'),
+        ]
+
 class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     description = models.TextField()
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    datetime = models.DateTimeField(auto_now_add=True)
+    datetime = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-datetime', '-id'], name='expense_user_datetime_idx'),
+        ]
+
+
+class ArchivedCash(models.Model):
+    """AddCash rows moved out of the hot table by manage.py archive_transactions."""
+    # The id the row had in AddCash
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    source = models.CharField(max_length=255)
+    datetime = models.DateTimeField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-datetime', '-id'], name='archivedcash_user_datetime_idx'),
+        ]
+
+
+class ArchivedExpense(models.Model):
+    """Expense rows moved out of the hot table by manage.py archive_transactions."""
+    # The id the row had in Expense
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    description = models.TextField()
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    datetime = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-datetime', '-id'], name='archivedexp_user_datetime_idx'),
+        ]
+
+
+class OpeningBalance(models.Model):
+    """Totals of a user's archived rows, carried forward as the balance the hot tables start from."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='opening_balance')
+    # Rows dated before this were archived (newer rows may still predate it
+    # if they were added later with an older date)
+    archived_before = models.DateTimeField()
+    # Integer minor units: adding cents is exact, adding SQLite REAL decimals is not
+    added_cents = models.BigIntegerField(default=0)
+    spent_cents = models.BigIntegerField(default=0)
+    cash_count = models.PositiveIntegerField(default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user.username} Opening Balance'
+
+    @property
+    def total_added(self):
+        return from_cents(self.added_cents)
+
+    @property
+    def total_spent(self):
+        return from_cents(self.spent_cents)
+
+    @property
+    def balance(self):
+        return from_cents(self.added_cents - self.spent_cents)
+
+
+class UserBalance(models.Model):
+    """Running totals per user so the dashboard never re-aggregates history."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance')
+    # Integer minor units: adding cents is exact, adding SQLite REAL decimals is not
+    added_cents = models.BigIntegerField(default=0)
+    spent_cents = models.BigIntegerField(default=0)
+    cash_count = models.PositiveIntegerField(default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user.username} Balance'
+
+    @property
+    def total_added(self):
+        return from_cents(self.added_cents)
+
+    @property
+    def total_spent(self):
+        return from_cents(self.spent_cents)
+
+    @property
+    def balance(self):
+        return from_cents(self.added_cents - self.spent_cents)
+
+
+class PeriodSummary(models.Model):
+    """Per-user totals for one day, week or month, kept current on every write."""
+    DAY, WEEK, MONTH = 'day', 'week', 'month'
+    PERIOD_CHOICES = [(DAY, 'Daily'), (WEEK, 'Weekly'), (MONTH, 'Monthly')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='summaries')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    start = models.DateField()
+    # Integer minor units: adding cents is exact, adding SQLite REAL decimals is not
+    added_cents = models.BigIntegerField(default=0)
+    spent_cents = models.BigIntegerField(default=0)
+    cash_count = models.IntegerField(default=0)
+    expense_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'start'], name='periodsummary_user_period_start_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} {self.period} {self.start}'
+
+    @property
+    def total_added(self):
+        return from_cents(self.added_cents)
+
+    @property
+    def total_spent(self):
+        return from_cents(self.spent_cents)
+
+    @property
+    def balance(self):
+        return from_cents(self.added_cents - self.spent_cents)
+
+
+class ApiToken(models.Model):
+    """Key for the JSON API. Only a SHA-256 of the key is stored; the key is shown once."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.user.username} {self.name or "API token"}'
+
+    @staticmethod
+    def hash_key(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def generate(cls, user, name=''):
+        """Create a token and return it with its plain key."""
+        key = secrets.token_urlsafe(32)
+        return cls.objects.create(user=user, name=name, key_hash=cls.hash_key(key)), key
+
+
+class Job(models.Model):
+    """Slow work (imports, exports, rebuilds, account deletion) run by a worker outside the request."""
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    # Kept after the user is gone, so an account deletion can finish and report
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    kind = models.CharField(max_length=30)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Not picked up before this (retries back off)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} ({self.status})'
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
@@ -0,0 +1,78 @@
+from decimal import ROUND_HALF_UP, Decimal, DecimalException
+
+from django.db.models import BigIntegerField, F, Sum
+from django.db.models.functions import Cast, Round
+
+CENT = Decimal('0.01')
+# Largest value a DecimalField(max_digits=10, decimal_places=2) can hold
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class InvalidAmount(ValueError):
+    pass
+
+
+def parse_amount(value, allow_negative=False):
+    """
+    Parse user or file input straight to a Decimal quantized to cents,
+    without going through float. Zero is never a valid amount.
+    """
+    try:
+        amount = Decimal(str(value).replace(',', '').strip())
+    except DecimalException:
+        raise InvalidAmount('Invalid amount')
+    if not amount.is_finite():
+        raise InvalidAmount('Invalid amount')
+    if amount < 0 and not allow_negative:
+        raise InvalidAmount('Amount must be greater than 0')
+    # Before quantizing: quantize() raises InvalidOperation once the result
+    # needs more digits than the context precision (e.g. '1e30')
+    if amount.copy_abs() > MAX_AMOUNT:
+        raise InvalidAmount('Amount is too large')
+    amount = amount.quantize(CENT, rounding=ROUND_HALF_UP)
+    if amount == 0:
+        raise InvalidAmount('Amount must not be zero' if allow_negative else 'Amount must be greater than 0')
+    return amount
+
+
+def to_cents(amount):
+    """Decimal (or int/str) money value to integer minor units."""
+    return int((Decimal(str(amount)) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return (Decimal(cents or 0) / 100).quantize(CENT)
+
+
+class CentsSum(Sum):
+    """
+    Exact SUM of a money column, in integer cents.
+
+    SQLite stores DecimalField values as floating point and adds them as
+    floats, so plain ``Sum('amount')`` drifts over many rows. Each value is
+    rounded to whole cents first and integers are added instead.
+    """
+
+    def __init__(self, field, **extra):
+        super().__init__(
+            Cast(Round(F(field) * 100), BigIntegerField()),
+            output_field=BigIntegerField(), **extra,
+        )
+
+    def get_db_converters(self, connection):
+        return super().get_db_converters(connection) + [self._none_to_zero]
+
+    @staticmethod
+    def _none_to_zero(value, expression, connection):
+        return value or 0
+
+
+class MoneySum(CentsSum):
+    """Exact SUM of a money column, as a Decimal."""
+
+    def get_db_converters(self, connection):
+        return super().get_db_converters(connection) + [self._from_cents]
+
+    @staticmethod
+    def _from_cents(value, expression, connection):
+        return from_cents(value)
@@ -0,0 +1,81 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset plus the cursors around it."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous else None
+
+
+def encode_cursor(obj):
+    raw = f'{obj.datetime.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Return ``(datetime, pk)`` for a cursor, or ``None`` if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(stamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_page_size(request):
+    default = getattr(settings, 'TRANSACTION_PAGE_SIZE', 25)
+    maximum = getattr(settings, 'TRANSACTION_PAGE_SIZE_MAX', 100)
+    try:
+        size = int(request.GET.get('per_page', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def paginate(queryset, request):
+    """
+    Slice a queryset ordered by ``-datetime, -pk`` using the ``after`` /
+    ``before`` cursors in the request, so every page is a bounded index
+    range scan no matter how deep it is.
+    """
+    per_page = get_page_size(request)
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+
+    if before:
+        stamp, pk = before
+        rows = list(
+            queryset.filter(Q(datetime__gt=stamp) | Q(pk__gt=pk), datetime__gte=stamp)
+            .order_by('datetime', 'pk')[:per_page + 1]
+        )
+        if rows:
+            has_previous = len(rows) > per_page
+            return KeysetPage(rows[:per_page][::-1], has_next=True, has_previous=has_previous)
+
+    if after:
+        stamp, pk = after
+        queryset = queryset.filter(Q(datetime__lt=stamp) | Q(pk__lt=pk), datetime__lte=stamp)
+
+    rows = list(queryset.order_by('-datetime', '-pk')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=bool(after))
@@ -0,0 +1,53 @@
+import math
+import time
+
+from django.conf import settings
+
+from .caching import get_cache
+
+
+def get_write_limit():
+    return getattr(settings, 'WRITE_RATE_LIMIT', 60)
+
+
+def get_write_window():
+    return getattr(settings, 'WRITE_RATE_WINDOW', 60)
+
+
+def _window_key(user_id, window):
+    return f'cm:rate:{user_id}:{window}'
+
+
+def check_write_rate(user_id, now=None):
+    """
+    Count one write for the user against WRITE_RATE_LIMIT per
+    WRITE_RATE_WINDOW seconds. Returns 0 if it is allowed, otherwise the
+    seconds to wait (the write is not counted).
+
+    A sliding window counter: the current fixed window's count plus the
+    previous window's, weighted by how much of it still overlaps the last
+    WRITE_RATE_WINDOW seconds. Two cache calls per write, whatever the rate.
+    """
+    limit, width = get_write_limit(), get_write_window()
+    if not limit:
+        return 0
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, width)
+    current, previous = _window_key(user_id, int(window)), _window_key(user_id, int(window) - 1)
+    cache = get_cache()
+    counts = cache.get_many([previous, current])
+    done, before = counts.get(current, 0), counts.get(previous, 0)
+    if before * (1 - elapsed / width) + done >= limit:
+        if done >= limit or not before:
+            wait = width - elapsed
+        else:
+            # When the previous window's share has shrunk enough to fit one more
+            wait = width * (before - limit + done) / before - elapsed
+        return max(1, math.ceil(wait))
+    try:
+        cache.incr(current)
+    except ValueError:
+        # Kept for two windows: it is the previous window for the next one
+        if not cache.add(current, 1, 2 * width):
+            cache.incr(current)
+    return 0
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import AddCash, ArchivedCash, ArchivedExpense, Expense, PeriodSummary
+from .money import CentsSum, to_cents
+
+TRUNCATE = {
+    PeriodSummary.DAY: TruncDay,
+    PeriodSummary.WEEK: TruncWeek,
+    PeriodSummary.MONTH: TruncMonth,
+}
+DEFAULT_BUCKETS = {PeriodSummary.DAY: 30, PeriodSummary.WEEK: 12, PeriodSummary.MONTH: 12}
+SUMMARY_FIELDS = ('added_cents', 'spent_cents', 'cash_count', 'expense_count')
+
+
+def get_max_buckets():
+    return getattr(settings, 'REPORT_MAX_BUCKETS', 366)
+
+
+def local_day(stamp, tz=None):
+    """
+    The calendar day ``stamp`` falls on in the current time zone, as Trunc*
+    sees it. Pass ``tz`` when calling in a loop to skip looking it up.
+    """
+    if settings.USE_TZ and stamp.tzinfo is not None:
+        stamp = stamp.astimezone(tz or timezone.get_current_timezone())
+    return stamp.date()
+
+
+def period_start(period, day):
+    if period == PeriodSummary.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == PeriodSummary.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_start(period, start):
+    if period == PeriodSummary.WEEK:
+        return start + timedelta(days=7)
+    if period == PeriodSummary.MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def compute_rollups(user):
+    """
+    Build (unsaved) summaries for every bucket from the raw tables, archived
+    rows included, with Trunc* + GROUP BY.
+    """
+    buckets = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+    sources = (
+        (AddCash, 'added_cents', 'cash_count'),
+        (ArchivedCash, 'added_cents', 'cash_count'),
+        (Expense, 'spent_cents', 'expense_count'),
+        (ArchivedExpense, 'spent_cents', 'expense_count'),
+    )
+    for period, trunc in TRUNCATE.items():
+        for model, total_field, count_field in sources:
+            rows = (
+                model.objects.filter(user=user)
+                .annotate(start=trunc('datetime', output_field=DateField()))
+                .order_by()
+                .values('start')
+                .annotate(total=CentsSum('amount'), count=Count('id'))
+            )
+            for row in rows:
+                bucket = buckets[period, row['start']]
+                bucket[total_field] += row['total']
+                bucket[count_field] += row['count']
+    return [
+        PeriodSummary(user=user, period=period, start=start, **values)
+        for (period, start), values in buckets.items()
+    ]
+
+
+def rebuild_rollups(user):
+    """Replace a user's stored summaries with ones computed from scratch."""
+    with transaction.atomic():
+        PeriodSummary.objects.filter(user=user).delete()
+        PeriodSummary.objects.bulk_create(compute_rollups(user))
+
+
+def apply_day_deltas(user, day_deltas):
+    """
+    Add per-day changes, ``{day: (added, spent, cash_count, expense_count)}``,
+    to every daily, weekly and monthly bucket they fall in. Amounts are
+    Decimals; they are stored as whole cents.
+
+    Call inside the same transaction as the writes being described.
+    """
+    if not day_deltas:
+        return
+    changes = defaultdict(lambda: [0, 0, 0, 0])
+    for day, (added, spent, cash_count, expense_count) in day_deltas.items():
+        delta = (to_cents(added), to_cents(spent), cash_count, expense_count)
+        for period in TRUNCATE:
+            change = changes[period, period_start(period, day)]
+            for i, value in enumerate(delta):
+                change[i] += value
+
+    starts = [start for _, start in changes]
+    existing = {
+        (summary.period, summary.start): summary
+        for summary in PeriodSummary.objects.select_for_update().filter(
+            user=user, start__gte=min(starts), start__lte=max(starts),
+        )
+    }
+    updated, created = [], []
+    for key, change in changes.items():
+        summary = existing.get(key)
+        if summary is None:
+            summary = PeriodSummary(user=user, period=key[0], start=key[1])
+            created.append(summary)
+        else:
+            updated.append(summary)
+        for field, value in zip(SUMMARY_FIELDS, change):
+            setattr(summary, field, getattr(summary, field) + value)
+
+    PeriodSummary.objects.bulk_update(updated, SUMMARY_FIELDS)
+    PeriodSummary.objects.bulk_create(created)
+
+
+def adjust_rollups(user, stamp, added=0, spent=0, cash_count=0, expense_count=0):
+    """Apply one entry's change to the buckets containing ``stamp``."""
+    apply_day_deltas(user, {
+        local_day(stamp): (added, spent, cash_count, expense_count),
+    })
+
+
+def report_range(period, start=None, end=None):
+    """
+    Snap ``start``/``end`` (dates or ``None``) to bucket starts, defaulting to
+    the most recent buckets and keeping the span within REPORT_MAX_BUCKETS.
+    """
+    end = period_start(period, end or timezone.localdate())
+    if start is None:
+        start = end
+        for _ in range(DEFAULT_BUCKETS[period] - 1):
+            start = period_start(period, start - timedelta(days=1))
+    start = period_start(period, min(start, end))
+
+    buckets, cursor = 1, start
+    while cursor < end:
+        cursor = next_start(period, cursor)
+        buckets += 1
+    while buckets > get_max_buckets():
+        start = next_start(period, start)
+        buckets -= 1
+    return start, end
+
+
+def get_report(user, period, start=None, end=None):
+    """
+    One summary per bucket from ``start`` to ``end``, zero-filled, read from
+    the rollup table: a monthly report reads at most one row per month.
+    """
+    start, end = report_range(period, start, end)
+    stored = {
+        summary.start: summary
+        for summary in PeriodSummary.objects.filter(
+            user=user, period=period, start__gte=start, start__lte=end,
+        )
+    }
+    report, cursor = [], start
+    while cursor <= end:
+        report.append(stored.get(cursor) or PeriodSummary(user=user, period=period, start=cursor))
+        cursor = next_start(period, cursor)
+    return report
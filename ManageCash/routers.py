@@ -0,0 +1,72 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set by ReplicaMiddleware for requests whose ManageCash reads may go to a
+# replica. Everything else (writes, management commands, the shell, tests)
+# always reads from the primary.
+_replica_reads = ContextVar('replica_reads', default=False)
+# Set once the current request wrote ManageCash data to the primary.
+_wrote = ContextVar('wrote_primary', default=False)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def allow_replica_reads(allowed=True):
+    """Let (or stop) this request's ManageCash reads use a replica; returns a reset token."""
+    return _replica_reads.set(allowed), _wrote.set(False)
+
+
+def reset_replica_reads(tokens):
+    """Undo allow_replica_reads and report whether the request wrote anything."""
+    replica_token, wrote_token = tokens
+    wrote = _wrote.get()
+    _replica_reads.reset(replica_token)
+    _wrote.reset(wrote_token)
+    return wrote
+
+
+class ReplicaRouter:
+    """
+    Send ManageCash reads to one of DATABASE_REPLICAS and all writes to the
+    primary. A request reads from the primary once it has written any
+    ManageCash data, and ReplicaMiddleware keeps a user's next requests on
+    the primary for REPLICA_STICKY_SECONDS so they see their own writes
+    despite replica lag.
+    """
+
+    app_label = 'ManageCash'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label or not _replica_reads.get():
+            return None
+        replicas = get_replicas()
+        if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            _replica_reads.set(False)
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema (and data) by copying the primary.
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,151 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# model -> (FTS5 table, columns searched by the icontains fallback)
+SEARCH_INDEXES = {
+    'addcash': ('ManageCash_addcash_fts', ('source', 'description')),
+    'expense': ('ManageCash_expense_fts', ('description',)),
+}
+# Archive tables are rarely searched, so they only get the icontains fallback
+UNINDEXED_FIELDS = {
+    'archivedcash': ('source', 'description'),
+    'archivedexpense': ('description',),
+}
+
+_TRIGGERS = {
+    'ai': 'AFTER INSERT ON "{source}" BEGIN {insert} END',
+    'ad': 'AFTER DELETE ON "{source}" BEGIN {delete} END',
+    'au': 'AFTER UPDATE ON "{source}" BEGIN {delete} {insert} END',
+}
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_available = {}
+
+
+def fts_available(model):
+    """True if the FTS5 table for ``model`` exists on the default database."""
+    table = SEARCH_INDEXES[model._meta.model_name][0]
+    key = (connection.settings_dict['NAME'], table)
+    if key not in _available:
+        _available[key] = (
+            connection.vendor == 'sqlite'
+            and table in connection.introspection.table_names(include_views=False)
+        )
+    return _available[key]
+
+
+def match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, each as a
+    prefix, and quoted so user input can never be parsed as FTS syntax.
+    Punctuation is dropped, so a query without any word gives ``''``.
+    """
+    return ' '.join(f'"{word}"*' for word in _WORD_RE.findall(query))
+
+
+def search(queryset, query):
+    """
+    Filter a transaction queryset to entries matching ``query``.
+
+    Uses the FTS5 index when it is there and falls back to ``icontains`` on
+    the same columns otherwise. The queryset's ordering is left alone so the
+    list views can still page through the results by date.
+
+    With the index, words match from their start only: 'sal' finds
+    "Salary" but 'alary' does not, unlike the ``icontains`` fallback. A
+    query with no words at all (e.g. '$$') matches nothing.
+    """
+    model_name = queryset.model._meta.model_name
+    if model_name in UNINDEXED_FIELDS:
+        table, fields = None, UNINDEXED_FIELDS[model_name]
+    else:
+        table, fields = SEARCH_INDEXES[model_name]
+    if table and fts_available(queryset.model):
+        expression = match_expression(query)
+        if not expression:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{table}" WHERE "{table}" MATCH %s', [expression])
+        )
+
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition)
+
+
+def _trigger_sql(model_name, suffix):
+    table, fields = SEARCH_INDEXES[model_name]
+    cols = ', '.join(fields)
+    parts = {
+        'source': f'ManageCash_{model_name}',
+        'insert': f'INSERT INTO "{table}"(rowid, {cols}) VALUES (new.id, '
+                  + ', '.join(f'new.{c}' for c in fields) + ');',
+        'delete': f'INSERT INTO "{table}"("{table}", rowid, {cols}) VALUES (\'delete\', old.id, '
+                  + ', '.join(f'old.{c}' for c in fields) + ');',
+    }
+    return f'CREATE TRIGGER "{table}_{suffix}" ' + _TRIGGERS[suffix].format(**parts)
+
+
+def ensure_triggers(using='default'):
+    """
+    Recreate the triggers that keep the FTS5 tables in sync, if missing.
+
+    SQLite drops a table's triggers whenever a migration rebuilds it, so this
+    runs after every ``migrate``; a table that lost its triggers is reindexed.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        tables = set(conn.introspection.table_names(cursor))
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        triggers = {row[0] for row in cursor.fetchall()}
+        for model_name, (table, _) in SEARCH_INDEXES.items():
+            if table not in tables:
+                continue
+            missing = [suffix for suffix in _TRIGGERS if f'{table}_{suffix}' not in triggers]
+            if not missing:
+                continue
+            for suffix in missing:
+                cursor.execute(_trigger_sql(model_name, suffix))
+            cursor.execute(f"INSERT INTO \"{table}\"(\"{table}\") VALUES ('rebuild')")
+
+
+@contextmanager
+def deferred_index(model):
+    """
+    Index rows inserted inside the block with one ``INSERT ... SELECT`` at
+    the end instead of one trigger call per row, which is several times
+    faster for bulk loads.
+
+    Must run inside a transaction: the insert trigger is dropped for the
+    duration, and SQLite's write lock keeps other connections from inserting
+    until it is back.
+    """
+    if not fts_available(model):
+        yield
+        return
+    if not connection.in_atomic_block:
+        raise RuntimeError('deferred_index() must be used inside transaction.atomic().')
+
+    model_name = model._meta.model_name
+    table, fields = SEARCH_INDEXES[model_name]
+    source = model._meta.db_table
+    cols = ', '.join(fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER "{table}_ai"')
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{source}"')
+        last_id = cursor.fetchone()[0]
+
+    yield
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{table}"(rowid, {cols}) SELECT id, {cols} FROM "{source}" WHERE id > %s',
+            [last_id],
+        )
+        cursor.execute(_trigger_sql(model_name, 'ai'))
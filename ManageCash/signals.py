@@ -1,16 +1,44 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from .caching import invalidate, invalidation_deferred
+from .database import apply_pragmas
+from .models import AddCash, Expense, Profile
+from .search import ensure_triggers
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
 
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    apply_pragmas(connection)
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == 'ManageCash':
+        ensure_triggers(using)
+
+@receiver(post_save, sender=AddCash)
+@receiver(post_delete, sender=AddCash)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def invalidate_user_cache(sender, instance, **kwargs):
+    if invalidation_deferred():
+        return
+    # After commit, so a request racing the write cannot cache the old data
+    # under the new version.
+    transaction.on_commit(lambda: invalidate(instance.user_id))
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    try:
-        instance.profile.save()
-    except Profile.DoesNotExist:
-        Profile.objects.create(user=instance)
+@receiver(post_save, sender=Profile)
+def invalidate_profile_fragments(sender, instance, update_fields=None, **kwargs):
+    # The navbar fragment shows the name and picture. A login only touches
+    # last_login, which no page shows.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: invalidate(user_id))
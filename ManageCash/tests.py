@@ -0,0 +1,827 @@
+import base64
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import ModuleType
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.template.base import Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from ManageCash.archive import archive_user
+from ManageCash.caching import get_cache, invalidate
+from ManageCash.checks import check_shared_user_cache
+from ManageCash.database import RowsChanged
+from ManageCash.images import PICTURE_FIELDS, InvalidImage, validate_upload
+from ManageCash.importer import import_rows, parse_csv, parse_ofx
+from ManageCash.ledger import rebuild_balance
+from ManageCash.models import AddCash, ApiToken, ArchivedCash, ArchivedExpense, Expense, Job, PeriodSummary
+from ManageCash.money import InvalidAmount, parse_amount
+from ManageCash.pagination import encode_cursor, paginate
+from ManageCash.ratelimit import check_write_rate
+from ManageCash.reports import SUMMARY_FIELDS
+from ManageCash.search import fts_available, search
+from ManageCash.timeline import timeline_page
+from ManageCash.urls import build_urlpatterns
+
+
+class ParseAmountTests(SimpleTestCase):
+    def test_plain_and_grouped(self):
+        self.assertEqual(parse_amount('12.5'), Decimal('12.50'))
+        self.assertEqual(parse_amount('1,234.565'), Decimal('1234.57'))
+
+    def test_exponent_notation(self):
+        self.assertEqual(parse_amount('1e2'), Decimal('100.00'))
+        self.assertEqual(parse_amount('1.5E1'), Decimal('15.00'))
+        with self.assertRaisesMessage(InvalidAmount, 'greater than 0'):
+            parse_amount('1e-30')
+
+    def test_huge_values(self):
+        for value in ('1e30', '1e999999999', '1e9999999999', '100000000', '99999999.995'):
+            with self.subTest(value=value), self.assertRaisesMessage(InvalidAmount, 'too large'):
+                parse_amount(value)
+        with self.assertRaisesMessage(InvalidAmount, 'too large'):
+            parse_amount('-1e30', allow_negative=True)
+        self.assertEqual(parse_amount('99999999.99'), Decimal('99999999.99'))
+
+    def test_invalid(self):
+        for value in ('', 'abc', 'NaN', 'Infinity', '-5', '0'):
+            with self.subTest(value=value), self.assertRaises(InvalidAmount):
+                parse_amount(value)
+
+
+class UserTestCase(TestCase):
+    """Logged in as a new user, with an empty user cache."""
+
+    def setUp(self):
+        # Rolled-back users' ids are reused, and so would their cache entries be
+        get_cache().clear()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.client.force_login(self.user)
+
+    def assertLedgerInSync(self):
+        # Both commands raise CommandError when the stored totals drifted
+        for command in ('rebuild_balances', 'rebuild_reports'):
+            call_command(command, user=self.user.username, verify=True, stdout=StringIO())
+
+
+class AddEntryAmountTests(UserTestCase):
+    def test_huge_amount_is_a_form_error(self):
+        for url, data, model in (
+            (reverse('add_cash'), {'source': 'Salary'}, AddCash),
+            (reverse('add_expense'), {'description': 'Rent'}, Expense),
+        ):
+            for amount in ('1e30', '1e9999999999'):
+                with self.subTest(url=url, amount=amount):
+                    response = self.client.post(url, {**data, 'amount': amount})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertContains(response, 'Amount is too large')
+                    self.assertFalse(model.objects.exists())
+
+
+class EntryTestCase(UserTestCase):
+    """Logged in as a user with one income of 10 and one expense of 4, added through the views."""
+
+    def setUp(self):
+        super().setUp()
+        self.client.post(reverse('add_cash'), {'source': 'Salary', 'amount': '10'})
+        self.client.post(reverse('add_expense'), {'description': 'Rent', 'amount': '4'})
+
+
+class DeleteEntryTests(EntryTestCase):
+    def test_delete_adjusts_ledger(self):
+        self.client.post(reverse('delete_cash', args=[AddCash.objects.get().pk]))
+        self.assertFalse(AddCash.objects.exists())
+        self.assertLedgerInSync()
+
+    def test_racing_deletes_adjust_once(self):
+        for model, url_name in ((AddCash, 'delete_cash'), (Expense, 'delete_expense')):
+            entry = model.objects.get()
+            # Both requests load the entry before either deletes it
+            with mock.patch.object(model.objects, 'get', return_value=entry):
+                for _ in range(2):
+                    self.client.post(reverse(url_name, args=[entry.pk]))
+            self.assertFalse(model.objects.exists())
+            self.assertLedgerInSync()
+
+
+class ApiDeleteTests(EntryTestCase):
+    def test_racing_deletes_adjust_once(self):
+        _, key = ApiToken.generate(self.user)
+        for model, url_name in ((AddCash, 'api_cash_detail'), (Expense, 'api_expense_detail')):
+            entry = model.objects.get()
+            with mock.patch.object(model.objects, 'get', return_value=entry):
+                for _ in range(2):
+                    response = self.client.delete(
+                        reverse(url_name, args=[entry.pk]), HTTP_AUTHORIZATION=f'Token {key}',
+                    )
+                    self.assertEqual(response.status_code, 204)
+            self.assertFalse(model.objects.exists())
+            self.assertLedgerInSync()
+
+
+class KeysetPaginationTests(UserTestCase):
+    PER_PAGE = 2
+
+    def setUp(self):
+        super().setUp()
+        start = timezone.now().replace(microsecond=0) - timedelta(days=10)
+        # Rows come in pairs sharing a datetime, so pages split ties that
+        # only the id orders
+        AddCash.objects.bulk_create(
+            AddCash(user=self.user, source=f'row {i}', amount=1, datetime=start + timedelta(hours=i // 2))
+            for i in range(7)
+        )
+        self.queryset = AddCash.objects.filter(user=self.user)
+        self.newest_first = list(self.queryset.order_by('-datetime', '-pk'))
+
+    def page(self, **params):
+        return paginate(self.queryset, RequestFactory().get('/', {'per_page': self.PER_PAGE, **params}))
+
+    def walk_forward(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(after=pages[-1].next_cursor))
+        return pages
+
+    def test_next_cursors_visit_every_row_once(self):
+        pages = self.walk_forward()
+        self.assertEqual([row for page in pages for row in page], self.newest_first)
+        self.assertEqual([page.has_previous for page in pages], [False, True, True, True])
+        self.assertIsNone(pages[-1].next_cursor)
+
+    def test_previous_cursors_walk_back_to_the_first_page(self):
+        pages = self.walk_forward()
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = self.page(before=page.previous_cursor)
+            self.assertEqual(page.object_list, expected.object_list)
+            self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_ties_are_ordered_by_id(self):
+        # The first page ends on the newer of a pair; the older one opens the next
+        first = self.page()
+        second = self.page(after=first.next_cursor)
+        self.assertEqual(first.object_list[-1].datetime, second.object_list[0].datetime)
+        self.assertGreater(first.object_list[-1].pk, second.object_list[0].pk)
+        self.assertEqual(self.page(before=second.previous_cursor).object_list, first.object_list)
+
+    def test_malformed_cursor_is_ignored(self):
+        def cursor(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+        for value in ('', 'not a cursor', '%%%', cursor('no separator'), cursor('yesterday|1'),
+                      cursor('2024-01-01T00:00:00+00:00|x'), '\u00e9t\u00e9'):
+            for direction in ('after', 'before'):
+                with self.subTest(value=value, direction=direction):
+                    page = self.page(**{direction: value})
+                    self.assertEqual(page.object_list, self.newest_first[:self.PER_PAGE])
+                    self.assertFalse(page.has_previous)
+        response = self.client.get(reverse('cash_list'), {'after': 'not a cursor'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_foreign_cursor_only_pages_own_rows(self):
+        other = User.objects.create_user('bob')
+        theirs = AddCash.objects.create(user=other, source='Gift', amount=1, datetime=self.newest_first[2].datetime)
+        # Their row sorts right before self.newest_first[2], which shares its datetime
+        page = self.page(after=encode_cursor(theirs))
+        self.assertEqual(page.object_list, self.newest_first[1:3])
+        page = self.page(before=encode_cursor(theirs))
+        self.assertEqual(page.object_list, self.newest_first[:1])
+
+
+class TimelineBalanceTests(UserTestCase):
+    PER_PAGE = 3
+
+    def setUp(self):
+        super().setUp()
+        start = timezone.now().replace(microsecond=0) - timedelta(days=30)
+        # Three incomes and one or two expenses a day, all at the same time,
+        # so page edges fall inside ties of both kinds
+        AddCash.objects.bulk_create(
+            AddCash(user=self.user, source=f'in {i}', amount=Decimal(10 + i), datetime=start + timedelta(days=i // 3))
+            for i in range(15)
+        )
+        Expense.objects.bulk_create(
+            Expense(user=self.user, description=f'out {i}', amount=Decimal(4 + i), datetime=start + timedelta(days=i // 2))
+            for i in range(10)
+        )
+        rebuild_balance(self.user)
+        # The first day goes to the archive and becomes the opening balance
+        archive_user(self.user, start + timedelta(days=1))
+
+    def expected_balances(self):
+        """``{(kind, pk): balance}`` oldest first, from summing every row, and the archived total."""
+        archived = (
+            sum(ArchivedCash.objects.values_list('amount', flat=True))
+            - sum(ArchivedExpense.objects.values_list('amount', flat=True))
+        )
+        rows = [(row.datetime, 'cash', row.pk, row.amount) for row in AddCash.objects.all()]
+        rows += [(row.datetime, 'expense', row.pk, -row.amount) for row in Expense.objects.all()]
+        balances, running = {}, archived
+        for _, kind, pk, amount in sorted(rows):
+            running += amount
+            balances[kind, pk] = running
+        return balances, archived
+
+    def page(self, **params):
+        return timeline_page(self.user, RequestFactory().get('/', {'per_page': self.PER_PAGE, **params}))
+
+    def walk(self, stale=False):
+        """Every page following the next cursors, then back again following the previous cursors."""
+        forward = [self.page()]
+        while forward[-1].has_next:
+            if stale:
+                invalidate(self.user.pk)
+            forward.append(self.page(after=forward[-1].next_cursor))
+        backward = [forward[-1]]
+        while backward[-1].has_previous:
+            if stale:
+                invalidate(self.user.pk)
+            backward.append(self.page(before=backward[-1].previous_cursor))
+        return forward, backward[::-1]
+
+    def assertBalances(self, pages):
+        balances, archived = self.expected_balances()
+        shown = {(entry.kind, entry.pk): entry.balance for page in pages for entry in page}
+        self.assertEqual(list(shown), list(balances)[::-1])
+        self.assertEqual(shown, balances)
+        self.assertEqual(pages[-1].opening_balance, archived)
+
+    def test_running_balance_across_pages(self):
+        forward, backward = self.walk()
+        self.assertGreater(len(forward), 3)
+        self.assertBalances(forward)
+        self.assertBalances(backward)
+
+    def test_stale_cursors_recompute_the_balance(self):
+        # Each data change voids the balance carried in the cursors
+        forward, backward = self.walk(stale=True)
+        self.assertBalances(forward)
+        self.assertBalances(backward)
+
+
+class ImportTests(UserTestCase):
+    def assertErrors(self, result, expected):
+        """``expected``: ``(line, part of the message)`` pairs."""
+        self.assertEqual([line for line, _ in result.errors], [line for line, _ in expected])
+        for (_, message), (_, part) in zip(result.errors, expected):
+            self.assertIn(part, message)
+
+    def test_csv(self):
+        stream = StringIO(
+            'Date, Type ,Amount,Source,Description\n'
+            '15/01/2024,income,100.50,Salary,January\n'
+            '2024-01-16,expense,"1,200.00",,Rent\n'
+            '17/01/2024,,-20,Shop,Groceries\n'
+            '18/01/2024,income,abc,Gift,\n'
+            'not a date,income,5,Gift,\n'
+            '19/01/2024,refund,5,Gift,\n'
+            '20/01/2024,income,5,,No source\n'
+            '21/01/2024,expense,0,,Nothing\n'
+            # Statements repeat identical lines; each is its own entry
+            '22/01/2024,expense,9.99,,Coffee\n'
+            '22/01/2024,expense,9.99,,Coffee\n'
+        )
+        result = import_rows(self.user, parse_csv(stream), batch_size=2)
+
+        self.assertErrors(result, [
+            (5, "'abc'"), (6, "invalid date 'not a date'"), (7, "unknown type 'refund'"),
+            (8, 'source is required'), (9, 'must not be zero'),
+        ])
+        self.assertEqual((result.cash_count, result.expense_count), (1, 4))
+        self.assertEqual(
+            list(AddCash.objects.values_list('source', 'description', 'amount')),
+            [('Salary', 'January', Decimal('100.50'))],
+        )
+        self.assertEqual(
+            list(Expense.objects.order_by('pk').values_list('description', 'amount')),
+            [('Rent', Decimal('1200.00')), ('Groceries', Decimal('20.00')),
+             ('Coffee', Decimal('9.99')), ('Coffee', Decimal('9.99'))],
+        )
+        stamps = Expense.objects.order_by('pk').values_list('datetime', flat=True)
+        self.assertEqual(
+            [timezone.localdate(stamp).isoformat() for stamp in stamps],
+            ['2024-01-16', '2024-01-17', '2024-01-22', '2024-01-22'],
+        )
+        self.assertLedgerInSync()
+        # The search index catches up once the batches are in
+        self.assertEqual(search(Expense.objects.filter(user=self.user), 'coffee').count(), 2)
+
+    def test_ofx(self):
+        statement = (
+            'OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            # SGML: the field tags are never closed
+            '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240115120000.000<TRNAMT>250.00'
+            '<NAME>Employer<MEMO>Payroll</STMTTRN>\n'
+            # XML style
+            '<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240116</DTPOSTED><TRNAMT>-42.10</TRNAMT>'
+            '<NAME>Grocer</NAME><MEMO>Weekly shop</MEMO></STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240117<TRNAMT>-1e30<NAME>Typo</STMTTRN>\n'
+            '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>2024-13-45<TRNAMT>-1.00<NAME>Bad date</STMTTRN>\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        # Small chunks so tags and values straddle reads
+        result = import_rows(self.user, parse_ofx(StringIO(statement), chunk_size=16))
+
+        self.assertErrors(result, [(3, 'too large'), (4, "invalid date '2024-13-45'")])
+        self.assertEqual(
+            list(AddCash.objects.values_list('source', 'description', 'amount')),
+            [('Employer', 'Payroll', Decimal('250.00'))],
+        )
+        self.assertEqual(
+            list(Expense.objects.values_list('description', 'amount')),
+            [('Grocer - Weekly shop', Decimal('42.10'))],
+        )
+        self.assertEqual(
+            AddCash.objects.get().datetime,
+            datetime(2024, 1, 15, 12, tzinfo=timezone.get_current_timezone()),
+        )
+        self.assertLedgerInSync()
+
+
+class ReportRollupTests(UserTestCase):
+    def rollups(self):
+        """The stored non-empty buckets, ``{(period, start): (added_cents, spent_cents, cash_count, expense_count)}``."""
+        values = {
+            (summary.period, summary.start): tuple(getattr(summary, field) for field in SUMMARY_FIELDS)
+            for summary in PeriodSummary.objects.filter(user=self.user)
+        }
+        return {key: value for key, value in values.items() if any(value)}
+
+    def test_add_and_delete_update_every_period(self):
+        today = timezone.localdate()
+        buckets = [
+            (PeriodSummary.DAY, today),
+            (PeriodSummary.WEEK, today - timedelta(days=today.weekday())),
+            (PeriodSummary.MONTH, today.replace(day=1)),
+        ]
+        self.client.post(reverse('add_cash'), {'source': 'Salary', 'amount': '10'})
+        self.client.post(reverse('add_cash'), {'source': 'Gift', 'amount': '2.50'})
+        self.client.post(reverse('add_expense'), {'description': 'Rent', 'amount': '4'})
+        self.assertEqual(self.rollups(), dict.fromkeys(buckets, (1250, 400, 2, 1)))
+
+        self.client.post(reverse('delete_cash', args=[AddCash.objects.get(source='Salary').pk]))
+        self.client.post(reverse('delete_expense', args=[Expense.objects.get().pk]))
+        self.assertEqual(self.rollups(), dict.fromkeys(buckets, (250, 0, 1, 0)))
+        self.assertLedgerInSync()
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        # 31 January and 1 February 2024 share a week but not a month
+        import_rows(self.user, parse_csv(StringIO(
+            'date,type,amount,source,description\n'
+            '31/01/2024,income,100,Salary,\n'
+            '01/02/2024,expense,30,,Rent\n'
+            '01/02/2024,income,5,Gift,\n'
+            '10/02/2024,expense,7,,Food\n'
+        )))
+        self.client.post(reverse('delete_expense', args=[Expense.objects.get(description='Rent').pk]))
+        self.client.post(reverse('add_expense'), {'description': 'Today', 'amount': '1'})
+
+        incremental = self.rollups()
+        self.assertEqual(incremental[PeriodSummary.DAY, date(2024, 2, 1)], (500, 0, 1, 0))
+        self.assertEqual(incremental[PeriodSummary.WEEK, date(2024, 1, 29)], (10500, 0, 2, 0))
+        self.assertEqual(incremental[PeriodSummary.MONTH, date(2024, 1, 1)], (10000, 0, 1, 0))
+        self.assertEqual(incremental[PeriodSummary.MONTH, date(2024, 2, 1)], (500, 700, 1, 1))
+        call_command('rebuild_reports', user=self.user.username, stdout=StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+
+class RebuildCommandTests(EntryTestCase):
+    def assertRebuildRefreshesPages(self, command):
+        self.client.get(reverse('dashboard'))  # shows the flash messages
+        etag = self.client.get(reverse('dashboard'))['ETag']
+        call_command(command, user=self.user.username, stdout=StringIO())
+        response = self.client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_balances_refreshes_pages(self):
+        self.assertRebuildRefreshesPages('rebuild_balances')
+
+    def test_rebuild_reports_refreshes_pages(self):
+        self.assertRebuildRefreshesPages('rebuild_reports')
+
+
+class ArchiveTests(EntryTestCase):
+    def test_archive_moves_rows(self):
+        moved = archive_user(self.user, timezone.now() + timedelta(days=1))
+        self.assertEqual(moved, {AddCash: 1, Expense: 1})
+        self.assertFalse(AddCash.objects.exists() or Expense.objects.exists())
+        self.assertEqual((ArchivedCash.objects.count(), ArchivedExpense.objects.count()), (1, 1))
+        self.assertLedgerInSync()
+
+    def test_rows_deleted_meanwhile_roll_back_the_batch(self):
+        with mock.patch('django.db.models.QuerySet.delete', return_value=(0, {})):
+            with self.assertRaises(RowsChanged):
+                archive_user(self.user, timezone.now() + timedelta(days=1))
+        self.assertFalse(ArchivedCash.objects.exists())
+        self.assertEqual(AddCash.objects.count(), 1)
+        self.assertLedgerInSync()
+
+
+class BulkDeleteTests(EntryTestCase):
+    def test_deletes_only_own_rows(self):
+        other = User.objects.create_user('bob')
+        theirs = AddCash.objects.create(user=other, source='Gift', amount=Decimal('3'))
+        mine = AddCash.objects.get(user=self.user)
+        response = self.client.post(reverse('bulk_cash'), {'action': 'delete', 'ids': [mine.pk, theirs.pk]})
+        self.assertRedirects(response, reverse('cash_list'), fetch_redirect_response=False)
+        self.assertEqual(list(AddCash.objects.all()), [theirs])
+        self.assertLedgerInSync()
+
+    def test_deleted_rows_send_signals_and_invalidate_once(self):
+        self.client.post(reverse('add_expense'), {'description': 'Food', 'amount': '1'})
+        receiver = mock.Mock()
+        post_delete.connect(receiver, sender=Expense)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Expense)
+        ids = list(Expense.objects.values_list('pk', flat=True))
+        with mock.patch('ManageCash.bulk.invalidate') as bulk_invalidate, \
+                mock.patch('ManageCash.signals.invalidate') as signal_invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('bulk_expenses'), {'action': 'delete', 'ids': ids})
+        self.assertEqual(receiver.call_count, 2)
+        bulk_invalidate.assert_called_once_with(self.user.pk)
+        signal_invalidate.assert_not_called()
+        self.assertLedgerInSync()
+
+    def test_rows_deleted_meanwhile_roll_back(self):
+        expense = Expense.objects.get()
+        with mock.patch('django.db.models.QuerySet.delete', return_value=(0, {})):
+            response = self.client.post(reverse('bulk_expenses'), {'action': 'delete', 'ids': [expense.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Expense.objects.exists())
+        self.assertLedgerInSync()
+
+
+@override_settings(JOB_RUNNER='inline', ARCHIVE_BATCH_SIZE=1)
+class DeleteAccountTests(EntryTestCase):
+    def test_job_deletes_everything(self):
+        self.client.post(reverse('add_cash'), {'source': 'Bonus', 'amount': '2'})
+        archive_user(self.user, timezone.now() + timedelta(days=1))
+        self.client.post(reverse('add_cash'), {'source': 'Salary', 'amount': '10'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('delete_account'), {'password': 'pw'})
+        job = Job.objects.get(kind='delete_account')
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result['deleted']['AddCash'], 1)
+        self.assertEqual(job.result['deleted']['ArchivedCash'], 2)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model in (AddCash, Expense, ArchivedCash, ArchivedExpense, PeriodSummary):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+
+@override_settings(JOB_RUNNER='inline')
+class ExportJobTests(EntryTestCase):
+    def setUp(self):
+        super().setUp()
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(JOB_FILES_ROOT=files.name, MEDIA_ROOT=media.name))
+
+    def test_export_is_private(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('export_cash'), {'background': '1', 'format': 'csv'})
+        job = Job.objects.get(kind='export')
+        self.assertEqual(job.status, Job.DONE)
+        self.assertTrue(os.path.exists(os.path.join(settings.JOB_FILES_ROOT, job.result['file'])))
+        self.assertEqual(os.listdir(settings.MEDIA_ROOT), [])
+
+        response = self.client.get(reverse('job_download', args=[job.pk]))
+        self.assertIn(b'Salary', b''.join(response.streaming_content))
+        User.objects.create_user('bob', password='pw')
+        self.client.login(username='bob', password='pw')
+        self.assertEqual(self.client.get(reverse('job_download', args=[job.pk])).status_code, 404)
+
+
+class SearchTests(EntryTestCase):
+    def test_words_match_by_prefix(self):
+        self.assertTrue(fts_available(AddCash))
+        cash = AddCash.objects.filter(user=self.user)
+        self.assertEqual(search(cash, 'sal').count(), 1)
+        self.assertEqual(search(cash, 'SALARY').count(), 1)
+        # The index matches words from their start, not substrings
+        self.assertEqual(search(cash, 'alary').count(), 0)
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(search(AddCash.objects.all(), '$$').count(), 0)
+        response = self.client.get(reverse('cash_list'), {'q': '$$'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Salary')
+
+
+async_urls = ModuleType('async_urls')
+async_urls.urlpatterns = build_urlpatterns(async_views=True)
+
+
+class ConditionalPageTests(EntryTestCase):
+    def setUp(self):
+        super().setUp()
+        # Show the flash messages from adding the entries; pages with
+        # pending messages get no ETag
+        self.client.get(reverse('dashboard'))
+
+    def test_second_request_is_not_modified(self):
+        for name in ('dashboard', 'cash_list', 'expense_list'):
+            with self.subTest(name=name):
+                first = self.client.get(reverse(name))
+                self.assertEqual(first.status_code, 200)
+                second = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(second.status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        first = self.client.get(reverse('cash_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_cash'), {'source': 'Bonus', 'amount': '1'})
+        self.client.get(reverse('dashboard'))  # shows the flash message
+        second = self.client.get(reverse('cash_list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+
+@override_settings(ROOT_URLCONF=async_urls)
+class AsyncConditionalPageTests(TransactionTestCase):
+    # The async views query from worker threads, which would block on the
+    # open transaction of a TestCase
+    def setUp(self):
+        get_cache().clear()
+
+    async def test_first_visit_revalidates(self):
+        user = await User.objects.acreate_user('alice', password='pw')
+        await self.async_client.aforce_login(user)
+        for name in ('dashboard', 'cash_list', 'expense_list'):
+            with self.subTest(name=name):
+                first = await self.async_client.get(reverse(name))
+                self.assertEqual(first.status_code, 200)
+                second = await self.async_client.get(reverse(name), headers={'If-None-Match': first['ETag']})
+                self.assertEqual(second.status_code, 304)
+
+
+PERF_MIDDLEWARE = ['ManageCash.middleware.PerformanceMiddleware', *settings.MIDDLEWARE]
+
+
+def server_timing(response):
+    """``{metric: (duration ms, description)}`` from a Server-Timing header."""
+    timings = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        timings[name] = float(params['dur']), params.get('desc', '').strip('"')
+    return timings
+
+
+@override_settings(MIDDLEWARE=PERF_MIDDLEWARE, PERF_SLOW_REQUEST_MS=0, PERF_SLOW_LOG_SQL=50)
+class PerformanceMiddlewareTests(EntryTestCase):
+    def test_server_timing_and_slow_log(self):
+        with self.assertLogs('ManageCash.slow_requests', 'WARNING') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('dashboard'))
+        timings = server_timing(response)
+        self.assertEqual(timings['db'][1], f'{len(queries)} queries')
+        self.assertGreater(timings['tpl'][0], 0)
+        self.assertGreaterEqual(timings['total'][0], timings['tpl'][0])
+        # The render wrapper is gone once the request is over
+        self.assertEqual(Template.render.__qualname__, 'Template.render')
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['view'], entry['status'], entry['queries']), ('dashboard', 200, len(queries)))
+        self.assertEqual(len(entry['worst_sql']), len(queries))
+
+    @override_settings(PERF_SLOW_REQUEST_MS=60_000)
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('ManageCash.slow_requests', 'WARNING'):
+            response = self.client.get(reverse('dashboard'))
+        self.assertIn('db', server_timing(response))
+
+
+@override_settings(ROOT_URLCONF=async_urls, MIDDLEWARE=PERF_MIDDLEWARE, PERF_SLOW_REQUEST_MS=0, PERF_SLOW_LOG_SQL=50)
+class AsyncPerformanceMiddlewareTests(TransactionTestCase):
+    def test_worker_thread_queries_are_counted(self):
+        get_cache().clear()
+        user = User.objects.create_user('alice')
+        AddCash.objects.create(user=user, source='Salary', amount=10)
+        self.client.force_login(user)
+        with self.assertLogs('ManageCash.slow_requests', 'WARNING') as logs:
+            response = self.client.get(reverse('cash_list'))
+        self.assertContains(response, 'Salary')
+        entry = json.loads(logs.records[0].getMessage())
+        # run_concurrently loads the totals and the page rows on worker threads
+        statements = [query['sql'] for query in entry['worst_sql']]
+        self.assertTrue(any('COUNT(' in sql and 'ManageCash_addcash' in sql for sql in statements), statements)
+        self.assertTrue(any('ORDER BY' in sql and 'ManageCash_addcash' in sql for sql in statements), statements)
+        self.assertEqual(server_timing(response)['db'][1], f"{entry['queries']} queries")
+
+
+class PerfReportTests(SimpleTestCase):
+    def test_summarises_the_log(self):
+        def line(view, total_ms, sql):
+            return json.dumps({
+                'view': view, 'total_ms': total_ms, 'sql_ms': 1.0, 'template_ms': 2.0, 'queries': 3,
+                'worst_sql': [{'sql': sql, 'ms': total_ms / 2}],
+            })
+
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as log:
+            self.addCleanup(os.remove, log.name)
+            for total_ms in range(1, 101):
+                log.write(line('dashboard', total_ms, f'SELECT {total_ms}') + '\n')
+            log.write(line('cash_list', 7.0, 'SELECT cash') + '\n')
+            log.write('not json\n')
+        out = StringIO()
+        call_command('perf_report', path=log.name, sql=1, stdout=out)
+        output = out.getvalue()
+
+        # view, count, p50, p95, p99, queries, sql ms, template ms
+        rows = {row[0]: row[1:] for row in map(str.split, output.splitlines()) if len(row) == 8}
+        self.assertEqual(rows['dashboard'], ['100', '50.0', '95.0', '99.0', '3.0', '1.0', '2.0'])
+        self.assertEqual(rows['cash_list'][:4], ['1', '7.0', '7.0', '7.0'])
+        # Slowest view first, and its slowest statement
+        self.assertLess(output.index('dashboard'), output.index('cash_list'))
+        self.assertIn('50.0 ms  SELECT 100', output)
+        self.assertIn('1 unreadable line(s) skipped.', output)
+
+
+def image_upload(name='picture.png', size=(600, 300), format='PNG', mode='RGBA', color=(200, 30, 30, 128)):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ValidateUploadTests(SimpleTestCase):
+    def test_accepts_an_image(self):
+        upload = image_upload()
+        validate_upload(upload)
+        # Left ready to be stored
+        self.assertEqual(upload.tell(), 0)
+
+    def test_rejects(self):
+        cases = [
+            ('garbage', SimpleUploadedFile('picture.png', b'not an image'), {}, 'not a valid image'),
+            ('truncated', SimpleUploadedFile('picture.png', image_upload().read()[:100]), {}, 'not a valid image'),
+            ('format', image_upload('picture.bmp', format='BMP', mode='RGB', color='red'), {}, 'must be a JPG'),
+            ('bytes', image_upload(), {'PROFILE_PICTURE_MAX_UPLOAD_SIZE': 100}, 'or smaller'),
+            ('pixels', image_upload(), {'PROFILE_PICTURE_MAX_PIXELS': 100 * 100}, 'too many pixels'),
+        ]
+        for name, upload, limits, message in cases:
+            with self.subTest(name), override_settings(**limits), self.assertRaisesMessage(InvalidImage, message):
+                validate_upload(upload)
+
+
+@override_settings(PROFILE_PICTURE_ASYNC=False, PROFILE_PICTURE_MAX_SIDE=200)
+class ProfilePictureTests(UserTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('profile'), {'email': 'alice@example.com', 'profile_picture': upload})
+        self.user.profile.refresh_from_db()
+        return response
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), settings.MEDIA_ROOT)
+            for root, _, names in os.walk(settings.MEDIA_ROOT) for name in names
+        )
+
+    def test_upload_builds_picture_and_thumbnails(self):
+        self.upload(image_upload())
+        profile = self.user.profile
+        self.assertEqual(profile.picture_pending, '')
+        sizes = {}
+        for field in PICTURE_FIELDS:
+            with Image.open(getattr(profile, field).path) as image:
+                sizes[field] = (image.format, image.size)
+        self.assertEqual(sizes, {
+            'profile_picture': ('JPEG', (200, 100)),
+            'thumbnail_small': ('JPEG', (48, 48)),
+            'thumbnail_large': ('JPEG', (256, 256)),
+        })
+        # Content-hashed names; the pending upload is gone
+        names = [getattr(profile, field).name for field in PICTURE_FIELDS]
+        self.assertEqual(self.stored_files(), sorted(names))
+        self.assertTrue(all(re.fullmatch(r'profile_pics/[0-9a-f]{16}(_\d+)?\.jpg', name) for name in names), names)
+
+    def test_new_upload_replaces_the_old_files(self):
+        self.upload(image_upload())
+        first = self.stored_files()
+        self.upload(image_upload())
+        self.assertEqual(self.stored_files(), first)
+        self.upload(image_upload(color=(0, 0, 255, 255)))
+        self.assertEqual(len(self.stored_files()), 3)
+        self.assertFalse(set(first) & set(self.stored_files()))
+
+    def test_invalid_upload_is_a_form_error(self):
+        response = self.upload(SimpleUploadedFile('picture.png', b'not an image'))
+        self.assertContains(response, 'Profile picture is not a valid image')
+        self.assertFalse(self.user.profile.profile_picture)
+        self.assertEqual(self.stored_files(), [])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_process_local_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_user_cache(None)], ['ManageCash.E001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_user_cache(None), [])
+
+
+class QueryCountTests(UserTestCase):
+    # Exact query counts per page with a warm session, checked in this order:
+    # name -> (URL name, queries)
+    PAGE_QUERIES = {
+        # session, user + profile, balance row, recent income and expenses (one UNION ALL)
+        'dashboard (cold cache)': ('dashboard', 4),
+        # session, user + profile
+        'dashboard (cached)': ('dashboard', 2),
+        # session, user + profile; answered 304 from the ETag without rendering
+        'dashboard (not modified)': ('dashboard', 2),
+        # session, user + profile, sum and count (one aggregate), page rows
+        'cash_list (cold cache)': ('cash_list', 4),
+        # session, user + profile, page rows
+        'cash_list (cached)': ('cash_list', 3),
+        'expense_list (cold cache)': ('expense_list', 4),
+        'expense_list (cached)': ('expense_list', 3),
+        # session, user + profile, balance row, merged page (one UNION ALL)
+        'timeline': ('timeline', 4),
+        # session, user + profile, merged page; the opening balance comes from the cursor
+        'timeline (next page)': ('timeline', 3),
+    }
+    # Small pages so the timeline has a second page to follow
+    PER_PAGE = 2
+
+    def test_page_query_counts(self):
+        AddCash.objects.bulk_create(AddCash(user=self.user, source='check', amount=1) for _ in range(3))
+        Expense.objects.bulk_create(Expense(user=self.user, description='check', amount=1) for _ in range(3))
+        rebuild_balance(self.user)
+
+        etag = cursor = None
+        for name, (url_name, count) in self.PAGE_QUERIES.items():
+            not_modified = name.endswith('(not modified)')
+            headers = {'If-None-Match': etag} if not_modified and etag else {}
+            params = {'per_page': self.PER_PAGE}
+            if name.endswith('(next page)'):
+                params['after'] = cursor
+            with self.subTest(page=name), self.assertNumQueries(count):
+                response = self.client.get(reverse(url_name), params, headers=headers)
+            self.assertEqual(response.status_code, 304 if not_modified else 200, name)
+            etag = response.get('ETag')
+            # The "Older" link's cursor, for the next page
+            match = re.search(r'after=([\w-]+)', response.content.decode())
+            cursor = match.group(1) if match else None
+
+
+class WriteGuardTests(UserTestCase):
+    def test_form_replay_inserts_once(self):
+        form = {'description': 'check', 'amount': '1.00', 'idempotency_key': 'form-key'}
+        statuses = [self.client.post(reverse('add_expense'), form).status_code for _ in range(2)]
+        self.assertEqual(statuses, [302, 302])
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_api_replay_inserts_once(self):
+        _, key = ApiToken.generate(self.user)
+        headers = {'Authorization': f'Token {key}', 'Idempotency-Key': 'api-key'}
+        body = json.dumps([{'description': 'check', 'amount': '2.00'}] * 3)
+        first, second = (
+            self.client.post(reverse('api_expense_list'), body, content_type='application/json', headers=headers)
+            for _ in range(2)
+        )
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(Expense.objects.count(), 3)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+
+    @override_settings(WRITE_RATE_LIMIT=3, WRITE_RATE_WINDOW=60)
+    def test_sliding_window(self):
+        # (seconds since the start of a window, expected wait): three writes
+        # fill the window; 90s in, half of the previous window still counts
+        # (1.5), so two more fit and the third waits for it to shrink.
+        expected = [(0, 0), (1, 0), (2, 0), (3, 57), (90, 0), (91, 0), (92, 8)]
+        # Long before now, so these don't count in the current window
+        start = 600
+        waits = [(offset, check_write_rate(self.user.pk, now=start + offset)) for offset, _ in expected]
+        self.assertEqual(waits, expected)
+
+    @override_settings(WRITE_RATE_LIMIT=3, WRITE_RATE_WINDOW=60)
+    def test_form_rate_limit(self):
+        form = {'description': 'check', 'amount': '1.00'}
+        statuses = [self.client.post(reverse('add_expense'), form).status_code for _ in range(4)]
+        self.assertEqual(statuses, [302, 302, 302, 429])
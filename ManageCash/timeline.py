@@ -0,0 +1,158 @@
+import base64
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+from .caching import data_version
+from .ledger import entries_query, entry_key, get_balance, load_entry, summarize
+from .models import AddCash, Expense
+from .money import CentsSum, from_cents, to_cents
+from .pagination import KeysetPage, get_page_size
+
+# Entry kinds in the order they sort on equal datetimes
+KINDS = ('cash', 'expense')
+
+_signer = signing.Signer(salt='ManageCash.timeline')
+
+
+class TimelinePage(KeysetPage):
+    """
+    One page of the merged timeline, newest first, each entry carrying
+    ``kind`` and its running ``balance``. The cursors also carry the running
+    balance at the page edge so the next page can continue from it without
+    summing history.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, user_id, below_cents):
+        super().__init__(object_list, has_next, has_previous)
+        self.user_id = user_id
+        # Balance of everything older than this page
+        self.below_cents = below_cents
+
+    @property
+    def opening_balance(self):
+        """Balance before the page's oldest entry; on the last page, the archived rows' total."""
+        return from_cents(self.below_cents)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next:
+            return None
+        return encode_cursor(self.user_id, self.object_list[-1], self.below_cents)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous:
+            return None
+        first = self.object_list[0]
+        return encode_cursor(self.user_id, first, to_cents(first.balance))
+
+
+def encode_cursor(user_id, entry, balance_cents):
+    """
+    Signed cursor for ``entry`` holding the running balance on its older
+    side, valid until the user's data version changes.
+    """
+    raw = f'{entry.datetime.isoformat()}|{entry.kind}|{entry.pk}|{balance_cents}|{data_version(user_id)}'
+    return base64.urlsafe_b64encode(_signer.sign(raw).encode()).decode().rstrip('=')
+
+
+def decode_cursor(value, user_id):
+    """
+    ``((datetime, kind, pk), balance_cents)`` for a cursor, with
+    ``balance_cents`` ``None`` once the data changed; ``None`` if the
+    cursor is malformed.
+    """
+    if not value:
+        return None
+    try:
+        raw = _signer.unsign(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode())
+        stamp, kind, pk, cents, version = raw.split('|')
+        key = (datetime.fromisoformat(stamp), kind, int(pk))
+        cents = int(cents)
+    except (ValueError, UnicodeDecodeError, signing.BadSignature):
+        return None
+    if kind not in KINDS:
+        return None
+    return key, cents if version == str(data_version(user_id)) else None
+
+
+def beyond(kind, key, newer, inclusive=False):
+    """Q for the ``kind`` rows sorting after (``newer``) or before ``key`` in the timeline."""
+    stamp, key_kind, pk = key
+    strict, loose = ('gt', 'gte') if newer else ('lt', 'lte')
+    if kind == key_kind:
+        # Same shape as pagination.paginate so the index serves the range
+        return Q(
+            Q(**{f'datetime__{strict}': stamp}) | Q(**{f'pk__{loose if inclusive else strict}': pk}),
+            **{f'datetime__{loose}': stamp},
+        )
+    ties_included = (KINDS.index(kind) > KINDS.index(key_kind)) == newer
+    return Q(**{f'datetime__{loose if ties_included else strict}': stamp})
+
+
+def signed_cents(entry):
+    return to_cents(entry.amount) if entry.kind == 'cash' else -to_cents(entry.amount)
+
+
+def _ledger_cents(user):
+    ledger = get_balance(user)
+    return ledger.added_cents - ledger.spent_cents
+
+
+def balance_at(user, key, include_key):
+    """
+    Running balance of the entries older than ``key``, plus ``key`` itself
+    with ``include_key``: the ledger balance minus everything newer. Only
+    used when a cursor's balance is stale.
+    """
+    newer = {
+        kind: summarize(model.objects.filter(beyond(kind, key, True, not include_key), user=user), CentsSum)
+        for kind, model in (('cash', AddCash), ('expense', Expense))
+    }
+    return _ledger_cents(user) - newer['cash']['total'] + newer['expense']['total']
+
+
+def _fetch(user, limit, key=None, newer=False):
+    """Up to ``limit`` entries beyond ``key``, nearest first, from one UNION ALL query."""
+    filters = {kind: beyond(kind, key, newer) for kind in KINDS} if key else None
+    rows = entries_query(user, limit, filters, ascending=newer)
+    return [load_entry(row, user, rows.db) for row in sorted(rows, key=entry_key, reverse=not newer)[:limit]]
+
+
+def timeline_page(user, request):
+    """
+    The page of the user's merged incomes and expenses selected by the
+    request's ``after``/``before`` cursors, with running balances. Costs
+    one query per page, plus the balance row on the first page or after
+    the data changed.
+    """
+    per_page = get_page_size(request)
+    after = decode_cursor(request.GET.get('after', ''), user.pk)
+    before = decode_cursor(request.GET.get('before', ''), user.pk)
+
+    if before:
+        key, below = before
+        entries = _fetch(user, per_page + 1, key, newer=True)
+        if entries:
+            if below is None:
+                below = balance_at(user, key, include_key=True)
+            has_previous = len(entries) > per_page
+            running = below
+            for entry in entries[:per_page]:
+                running += signed_cents(entry)
+                entry.balance = from_cents(running)
+            return TimelinePage(entries[:per_page][::-1], True, has_previous, user.pk, below)
+
+    if after:
+        key, running = after
+        if running is None:
+            running = balance_at(user, key, include_key=False)
+    else:
+        key, running = None, _ledger_cents(user)
+    entries = _fetch(user, per_page + 1, key)
+    for entry in entries[:per_page]:
+        entry.balance = from_cents(running)
+        running -= signed_cents(entry)
+    return TimelinePage(entries[:per_page], len(entries) > per_page, bool(after), user.pk, running)
@@ -1,21 +1,66 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views
 
-urlpatterns = [
-    path('', views.dashboard, name='dashboard'),
-    path('register/', views.register, name='register'),
-    path('login/', views.login_view, name='login'),
-    path('logout/', views.logout_view, name='logout'),
-    path('profile/', views.profile, name='profile'),
-    path('password-change/', views.password_change, name='password_change'),
-    
-    # Cash management
-    path('add-cash/', views.add_cash, name='add_cash'),
-    path('cash-list/', views.cash_list, name='cash_list'),
-    path('cash/<int:pk>/delete/', views.delete_cash, name='delete_cash'),
-    
-    # Expense management
-    path('add-expense/', views.add_expense, name='add_expense'),
-    path('expense-list/', views.expense_list, name='expense_list'),
-    path('expense/<int:pk>/delete/', views.delete_expense, name='delete_expense'),
-]
+# Read-heavy pages with an async variant, used when served over ASGI
+READ_VIEWS = {
+    'dashboard': (views.dashboard, views.dashboard_async),
+    'cash_list': (views.cash_list, views.cash_list_async),
+    'expense_list': (views.expense_list, views.expense_list_async),
+}
+
+
+def build_urlpatterns(async_views=False):
+    read = {name: pair[bool(async_views)] for name, pair in READ_VIEWS.items()}
+    return [
+        path('', read['dashboard'], name='dashboard'),
+        path('register/', views.register, name='register'),
+        path('login/', views.login_view, name='login'),
+        path('logout/', views.logout_view, name='logout'),
+        path('profile/', views.profile, name='profile'),
+        path('password-change/', views.password_change, name='password_change'),
+        
+        # Cash management
+        path('add-cash/', views.add_cash, name='add_cash'),
+        path('cash-list/', read['cash_list'], name='cash_list'),
+        path('cash/<int:pk>/delete/', views.delete_cash, name='delete_cash'),
+        path('cash-list/export/', views.export_transactions, {'kind': 'cash'}, name='export_cash'),
+        path('cash-list/bulk/', views.bulk_entries, {'kind': 'cash'}, name='bulk_cash'),
+        
+        # Income and expenses together, with running balance
+        path('timeline/', views.timeline, name='timeline'),
+        
+        # Reports
+        path('reports/', views.reports, name='reports'),
+        path('reports/data/', views.report_data, name='report_data'),
+        
+        # Monitoring
+        path('cache-stats/', views.cache_stats, name='cache_stats'),
+        
+        # Bulk import
+        path('import/', views.import_transactions, name='import_transactions'),
+        
+        # Background jobs (imports, background exports, rebuilds)
+        path('reports/rebuild/', views.rebuild_reports, name='rebuild_reports'),
+        path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+        path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+        path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+        path('account/delete/', views.delete_account, name='delete_account'),
+        
+        # Expense management
+        path('add-expense/', views.add_expense, name='add_expense'),
+        path('expense-list/', read['expense_list'], name='expense_list'),
+        path('expense/<int:pk>/delete/', views.delete_expense, name='delete_expense'),
+        path('expense-list/export/', views.export_transactions, {'kind': 'expense'}, name='export_expenses'),
+        path('expense-list/bulk/', views.bulk_entries, {'kind': 'expense'}, name='bulk_expenses'),
+        
+        # JSON API (token auth)
+        path('api/v1/cash/', api.entry_list, {'kind': 'cash'}, name='api_cash_list'),
+        path('api/v1/cash/<int:pk>/', api.entry_detail, {'kind': 'cash'}, name='api_cash_detail'),
+        path('api/v1/expenses/', api.entry_list, {'kind': 'expense'}, name='api_expense_list'),
+        path('api/v1/expenses/<int:pk>/', api.entry_detail, {'kind': 'expense'}, name='api_expense_detail'),
+        path('api/v1/summary/', api.summary, name='api_summary'),
+    ]
+
+
+urlpatterns = build_urlpatterns(getattr(settings, 'ASYNC_VIEWS', False))
@@ -1,11 +1,41 @@
-from django.shortcuts import render, redirect
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Sum, Q
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_http_methods
-from .models import AddCash, Expense, Profile
+from .models import AddCash, Expense, Job, PeriodSummary
+from .archive import archive_model, get_opening_balance
+from .bulk import delete_entries, get_max_items as get_bulk_max_items, set_source
+from .caching import acached, adata_version, cached, data_etag, data_version, stats
+from .concurrency import run_concurrently
+from .context_processors import get_profile
+from .database import RowsChanged
+from .exporter import CONTENT_TYPES, day_bound, export_querysets, stream_export
+from .idempotency import claim, release, remember, request_key
+from .images import InvalidImage, clear_pictures, stage_upload, validate_upload
+from .importer import SOURCE_MAX_LENGTH
+from .jobs import LABELS, enqueue, get_storage as get_job_storage, stage_file
+from .ledger import adjust_balance, get_balance, recent_entries, summarize
+from .money import InvalidAmount, parse_amount
+from .pagination import paginate
+from .ratelimit import check_write_rate
+from .reports import adjust_rollups, get_report
+from .search import search
+from .timeline import timeline_page
 
 
 def register(request):
@@ -70,35 +100,158 @@ def logout_view(request):
     return redirect('login')
 
 
-@login_required(login_url='login')
-def dashboard(request):
-    # Get all cash additions and expenses for the current user
-    cash_additions = AddCash.objects.filter(user=request.user).order_by('-datetime')
-    expenses = Expense.objects.filter(user=request.user).order_by('-datetime')
-    
-    # Calculate totals
-    total_added = AddCash.objects.filter(user=request.user).aggregate(Sum('amount'))['amount__sum'] or 0
-    total_spent = Expense.objects.filter(user=request.user).aggregate(Sum('amount'))['amount__sum'] or 0
-    balance = total_added - total_spent
-    
-    # Get recent transactions (last 5)
-    recent_added = cash_additions[:5]
-    recent_expenses = expenses[:5]
+def _page_etag(request):
+    """
+    ETag for a read page: the user's data version plus everything else the
+    markup shows (URL, navbar name and picture, and the CSRF secret behind
+    the list pages' form tokens, which login rotates). ``None`` while flash
+    messages are waiting, since those must be rendered.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    # Creates the CSRF secret on a first visit now, not while rendering after
+    # the ETag was sent, so the next request's ETag matches
+    get_token(request)
+    user = request.user
+    profile = getattr(user, 'profile', None)
+    return data_etag(
+        user.pk, getattr(settings, 'PAGE_ETAG_SALT', ''), request.get_full_path(),
+        user.username, user.first_name, request.META['CSRF_COOKIE'],
+        profile.thumbnail_small.name if profile else '',
+        profile.profile_picture.name if profile else '',
+    )
+
+
+def _finish_conditional(response, etag):
+    if etag and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+    # Per-user pages: browsers may keep them but must revalidate every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(view):
+    """
+    Answer a GET whose If-None-Match holds the page's current ETag with 304
+    before the view runs any query or renders a template. Goes inside
+    login_required.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            request.user = await request.auser()
+            etag = await sync_to_async(_page_etag)(request)
+            response = get_conditional_response(request, etag=etag) if etag else None
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return _finish_conditional(response, etag)
+        return async_wrapper
     
-    context = {
-        'total_added': total_added,
-        'total_spent': total_spent,
-        'balance': balance,
-        'cash_additions_count': cash_additions.count(),
-        'expenses_count': expenses.count(),
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        etag = _page_etag(request)
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return _finish_conditional(response, etag)
+    return wrapper
+
+
+def guarded_write(template):
+    """
+    For form views that create an entry. A POST carrying an idempotency key
+    (the form's hidden field or an Idempotency-Key header) that was already
+    used redirects to the dashboard without running the view again, so a
+    double submit or retry cannot insert twice. Other POSTs count against
+    the user's write rate limit and get ``template`` back with 429 when over
+    it. A key is kept only if the view succeeded (redirected). Goes inside
+    login_required.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view(request, *args, **kwargs)
+            
+            user_id, key = request.user.pk, request_key(request)
+            if key and claim(user_id, view.__name__, key) is not None:
+                messages.info(request, 'That entry was already submitted.')
+                return redirect('dashboard')
+            
+            wait = check_write_rate(user_id)
+            if wait:
+                messages.error(request, f'Too many entries at once. Try again in {wait} seconds.')
+                response = render(request, template, status=429)
+                response['Retry-After'] = str(wait)
+            else:
+                try:
+                    response = view(request, *args, **kwargs)
+                except Exception:
+                    if key:
+                        release(user_id, view.__name__, key)
+                    raise
+            if key:
+                if response.status_code == 302:
+                    remember(user_id, view.__name__, key, 'done')
+                else:
+                    release(user_id, view.__name__, key)
+            return response
+        return wrapper
+    return decorator
+
+
+def _dashboard_context(ledger, recent):
+    recent_added, recent_expenses = recent
+    return {
+        'total_added': ledger.total_added,
+        'total_spent': ledger.total_spent,
+        'balance': ledger.balance,
+        'cash_additions_count': ledger.cash_count,
+        'expenses_count': ledger.expense_count,
         'recent_added': recent_added,
         'recent_expenses': recent_expenses,
     }
+
+
+def _dashboard_queries(user):
+    # Totals come from the running balance row instead of re-aggregating
+    # history; both recent lists come back from one UNION ALL query
+    return (
+        lambda: get_balance(user),
+        lambda: recent_entries(user),
+    )
+
+
+def _dashboard_data(user):
+    return _dashboard_context(*(query() for query in _dashboard_queries(user)))
+
+
+@login_required(login_url='login')
+@conditional_page
+def dashboard(request):
+    # Read before the data so the summary card fragment is never stored
+    # under a version newer than the totals it shows
+    version = data_version(request.user.pk)
+    context = cached(request.user.pk, 'dashboard', lambda: _dashboard_data(request.user))
     
-    return render(request, 'ManageCash/dashboard.html', context)
+    return render(request, 'ManageCash/dashboard.html', {**context, 'cache_version': version})
 
 
 @login_required(login_url='login')
+@conditional_page
+async def dashboard_async(request):
+    user = request.user = await request.auser()
+    
+    async def compute():
+        return _dashboard_context(*await run_concurrently(*_dashboard_queries(user)))
+    
+    version = await adata_version(user.pk)
+    context = await acached(user.pk, 'dashboard', compute)
+    return await sync_to_async(render)(request, 'ManageCash/dashboard.html', {**context, 'cache_version': version})
+
+
+@login_required(login_url='login')
+@guarded_write('ManageCash/add_cash.html')
 def add_cash(request):
     if request.method == 'POST':
         source = request.POST.get('source', '')
@@ -110,20 +263,20 @@ def add_cash(request):
             return render(request, 'ManageCash/add_cash.html')
         
         try:
-            amount = float(amount)
-            if amount <= 0:
-                messages.error(request, 'Amount must be greater than 0!')
-                return render(request, 'ManageCash/add_cash.html')
-        except ValueError:
-            messages.error(request, 'Invalid amount!')
+            amount = parse_amount(amount)
+        except InvalidAmount as exc:
+            messages.error(request, f'{exc}!')
             return render(request, 'ManageCash/add_cash.html')
         
-        cash = AddCash.objects.create(
-            user=request.user,
-            source=source,
-            amount=amount,
-            description=description
-        )
+        with transaction.atomic():
+            cash = AddCash.objects.create(
+                user=request.user,
+                source=source,
+                amount=amount,
+                description=description
+            )
+            adjust_balance(request.user, added=cash.amount, cash_count=1)
+            adjust_rollups(request.user, cash.datetime, added=cash.amount, cash_count=1)
         messages.success(request, 'Cash added successfully!')
         return redirect('dashboard')
     
@@ -131,6 +284,7 @@ def add_cash(request):
 
 
 @login_required(login_url='login')
+@guarded_write('ManageCash/add_expense.html')
 def add_expense(request):
     if request.method == 'POST':
         description = request.POST.get('description', '')
@@ -141,19 +295,19 @@ def add_expense(request):
             return render(request, 'ManageCash/add_expense.html')
         
         try:
-            amount = float(amount)
-            if amount <= 0:
-                messages.error(request, 'Amount must be greater than 0!')
-                return render(request, 'ManageCash/add_expense.html')
-        except ValueError:
-            messages.error(request, 'Invalid amount!')
+            amount = parse_amount(amount)
+        except InvalidAmount as exc:
+            messages.error(request, f'{exc}!')
             return render(request, 'ManageCash/add_expense.html')
         
-        expense = Expense.objects.create(
-            user=request.user,
-            description=description,
-            amount=amount
-        )
+        with transaction.atomic():
+            expense = Expense.objects.create(
+                user=request.user,
+                description=description,
+                amount=amount
+            )
+            adjust_balance(request.user, spent=expense.amount, expense_count=1)
+            adjust_rollups(request.user, expense.datetime, spent=expense.amount, expense_count=1)
         messages.success(request, 'Expense recorded successfully!')
         return redirect('dashboard')
     
@@ -161,51 +315,256 @@ def add_expense(request):
 
 
 @login_required(login_url='login')
-def cash_list(request):
-    cash_additions = AddCash.objects.filter(user=request.user).order_by('-datetime')
-    
-    # Search functionality
-    search_query = request.GET.get('q', '')
-    if search_query:
-        cash_additions = cash_additions.filter(
-            Q(source__icontains=search_query) | Q(description__icontains=search_query)
-        )
-    
-    total = cash_additions.aggregate(Sum('amount'))['amount__sum'] or 0
-    count = cash_additions.count()
-    average = total / count if count > 0 else 0
+def import_transactions(request):
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if not upload:
+            messages.error(request, 'Choose a CSV or OFX file to import!')
+            return render(request, 'ManageCash/import.html')
+        
+        # Parsed and inserted by a job; the page polls for the result
+        job = enqueue('import', request.user, file=stage_file(upload), filename=upload.name)
+        return redirect('job_detail', pk=job.pk)
     
-    context = {
-        'cash_additions': cash_additions,
-        'search_query': search_query,
+    return render(request, 'ManageCash/import.html')
+
+
+def _list_context(name, page, filters, totals, opening_balance=None):
+    total = totals['total'] or 0
+    count = totals['count']
+    return {
+        name: page,
+        'page': page,
+        **filters,
         'total': total,
-        'average': average,
+        'count': count,
+        'average': total / count if count > 0 else 0,
+        'opening_balance': opening_balance,
+    }
+
+
+def _list_queries(request, user, model, section):
+    """
+    The list's filters, and its totals (cached) and page as two independent
+    queries. ``?archived=1`` lists the archived entries instead.
+    """
+    filters = {
+        'search_query': request.GET.get('q', ''),
+        'archived': request.GET.get('archived') == '1',
     }
+    if filters['archived']:
+        model = archive_model(model)
+    queryset = model.objects.for_user(user)
+    
+    # Search functionality
+    if filters['search_query']:
+        queryset = search(queryset, filters['search_query'])
+    
+    return filters, (
+        lambda: cached(
+            user.pk, section,
+            lambda: summarize(queryset),
+            filters['search_query'], filters['archived'],
+        ),
+        lambda: paginate(queryset, request),
+    )
+
+
+def _opening_balance(user, page, filters):
+    # Only the last page of the live list links to the archive
+    if page.has_next or filters['archived']:
+        return None
+    return cached(user.pk, 'archive', lambda: get_opening_balance(user))
+
+
+@login_required(login_url='login')
+@conditional_page
+def cash_list(request):
+    filters, (totals, page) = _list_queries(request, request.user, AddCash, 'cash_list')
+    page = page()
+    context = _list_context('cash_additions', page, filters, totals(), _opening_balance(request.user, page, filters))
     
     return render(request, 'ManageCash/cash_list.html', context)
 
 
 @login_required(login_url='login')
+@conditional_page
 def expense_list(request):
-    expenses = Expense.objects.filter(user=request.user).order_by('-datetime')
+    filters, (totals, page) = _list_queries(request, request.user, Expense, 'expense_list')
+    page = page()
+    context = _list_context('expenses', page, filters, totals(), _opening_balance(request.user, page, filters))
     
-    # Search functionality
-    search_query = request.GET.get('q', '')
-    if search_query:
-        expenses = expenses.filter(description__icontains=search_query)
+    return render(request, 'ManageCash/expense_list.html', context)
+
+
+async def _list_async(request, model, section, name, template):
+    user = request.user = await request.auser()
+    # search() may look up the FTS tables, so build the queryset off the event loop
+    filters, queries = await sync_to_async(_list_queries)(request, user, model, section)
+    totals, page = await run_concurrently(*queries)
+    opening_balance = await sync_to_async(_opening_balance)(user, page, filters)
+    context = _list_context(name, page, filters, totals, opening_balance)
+    return await sync_to_async(render)(request, template, context)
+
+
+@login_required(login_url='login')
+@conditional_page
+async def cash_list_async(request):
+    return await _list_async(request, AddCash, 'cash_list', 'cash_additions', 'ManageCash/cash_list.html')
+
+
+@login_required(login_url='login')
+@conditional_page
+async def expense_list_async(request):
+    return await _list_async(request, Expense, 'expense_list', 'expenses', 'ManageCash/expense_list.html')
+
+
+@login_required(login_url='login')
+@conditional_page
+def timeline(request):
+    page = timeline_page(request.user, request)
+    
+    return render(request, 'ManageCash/timeline.html', {'entries': page, 'page': page})
+
+
+@login_required(login_url='login')
+def export_transactions(request, kind):
+    """
+    Stream the user's entries as CSV or JSON, filtered like the list page;
+    archived entries are included when the range reaches back to them.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in CONTENT_TYPES:
+        return HttpResponseBadRequest('Unknown export format.')
     
-    total = expenses.aggregate(Sum('amount'))['amount__sum'] or 0
-    count = expenses.count()
-    average = total / count if count > 0 else 0
+    try:
+        start = day_bound(request.GET.get('start'))
+        end = day_bound(request.GET.get('end'), end=True)
+    except ValueError:
+        return HttpResponseBadRequest('Dates must look like YYYY-MM-DD.')
+    
+    if request.GET.get('background'):
+        # Written to a file by a job, for exports too big to wait on
+        job = enqueue(
+            'export', request.user, kind=kind, format=fmt, q=request.GET.get('q', ''),
+            start=request.GET.get('start', ''), end=request.GET.get('end', ''),
+        )
+        return redirect('job_detail', pk=job.pk)
+    
+    querysets = export_querysets(kind, request.user, request.GET.get('q', ''), start, end)
+    response = StreamingHttpResponse(stream_export(kind, querysets, fmt), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{kind}-{timezone.localdate()}.{fmt}"'
+    return response
+
+
+def _report_params(request):
+    """Read period/start/end from the query string; raises ValueError on bad input."""
+    period = request.GET.get('period', PeriodSummary.MONTH)
+    if period not in dict(PeriodSummary.PERIOD_CHOICES):
+        raise ValueError('Unknown report period.')
+    dates = []
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        day = parse_date(value) if value else None
+        if value and day is None:
+            raise ValueError('Dates must look like YYYY-MM-DD.')
+        dates.append(day)
+    return period, dates[0], dates[1]
+
+
+@login_required(login_url='login')
+def reports(request):
+    try:
+        period, start, end = _report_params(request)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        period, start, end = PeriodSummary.MONTH, None, None
+    
+    buckets = get_report(request.user, period, start, end)
+    largest = max([max(b.total_added, b.total_spent) for b in buckets] + [1])
     
     context = {
-        'expenses': expenses,
-        'search_query': search_query,
-        'total': total,
-        'average': average,
+        'buckets': buckets,
+        'largest': largest,
+        'period': period,
+        'periods': PeriodSummary.PERIOD_CHOICES,
+        'start': buckets[0].start,
+        'end': buckets[-1].start,
     }
+    return render(request, 'ManageCash/reports.html', context)
+
+
+@login_required(login_url='login')
+def report_data(request):
+    try:
+        period, start, end = _report_params(request)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
     
-    return render(request, 'ManageCash/expense_list.html', context)
+    buckets = get_report(request.user, period, start, end)
+    return JsonResponse({
+        'period': period,
+        'buckets': [
+            {
+                'start': bucket.start.isoformat(),
+                'total_added': str(bucket.total_added),
+                'total_spent': str(bucket.total_spent),
+                'balance': str(bucket.balance),
+                'cash_count': bucket.cash_count,
+                'expense_count': bucket.expense_count,
+            }
+            for bucket in buckets
+        ],
+    })
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def rebuild_reports(request):
+    # Recomputes the balance and every rollup from the raw rows
+    job = enqueue('rebuild_reports', request.user)
+    return redirect('job_detail', pk=job.pk)
+
+
+def _job_state(job):
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'finished': job.finished,
+        'attempts': job.attempts,
+        'result': job.result,
+        'error': job.error,
+    }
+
+
+@login_required(login_url='login')
+def job_detail(request, pk):
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    
+    return render(request, 'ManageCash/job.html', {'job': job, 'label': LABELS.get(job.kind, job.kind)})
+
+
+@login_required(login_url='login')
+def job_status(request, pk):
+    """Polled by the job page until the job finishes."""
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    
+    return JsonResponse(_job_state(job))
+
+
+@login_required(login_url='login')
+def job_download(request, pk):
+    job = get_object_or_404(Job, pk=pk, user=request.user, kind='export', status=Job.DONE)
+    storage = get_job_storage()
+    if not storage.exists(job.result['file']):
+        raise Http404('The export file has been removed.')
+    
+    return FileResponse(
+        storage.open(job.result['file'], 'rb'),
+        as_attachment=True, filename=job.result['filename'],
+        content_type=CONTENT_TYPES.get(job.payload['format']),
+    )
 
 
 @login_required(login_url='login')
@@ -214,7 +573,12 @@ def delete_cash(request, pk):
     try:
         cash = AddCash.objects.get(pk=pk, user=request.user)
         if request.method == 'POST':
-            cash.delete()
+            with transaction.atomic():
+                # A repeated or concurrent delete of the same entry removes nothing
+                deleted, _ = AddCash.objects.filter(pk=pk, user=request.user).delete()
+                if deleted:
+                    adjust_balance(request.user, added=-cash.amount, cash_count=-1)
+                    adjust_rollups(request.user, cash.datetime, added=-cash.amount, cash_count=-1)
             messages.success(request, 'Cash entry deleted successfully!')
             return redirect('cash_list')
         
@@ -235,7 +599,12 @@ def delete_expense(request, pk):
     try:
         expense = Expense.objects.get(pk=pk, user=request.user)
         if request.method == 'POST':
-            expense.delete()
+            with transaction.atomic():
+                # A repeated or concurrent delete of the same entry removes nothing
+                deleted, _ = Expense.objects.filter(pk=pk, user=request.user).delete()
+                if deleted:
+                    adjust_balance(request.user, spent=-expense.amount, expense_count=-1)
+                    adjust_rollups(request.user, expense.datetime, spent=-expense.amount, expense_count=-1)
             messages.success(request, 'Expense deleted successfully!')
             return redirect('expense_list')
         
@@ -250,14 +619,61 @@ def delete_expense(request, pk):
         return redirect('expense_list')
 
 
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def bulk_entries(request, kind):
+    """
+    Act on the entries ticked on a list page: ``action=delete`` removes
+    them, ``action=set_source`` (incomes only) moves them to one source.
+    Ids that are not the user's are ignored. Returns to the same list page.
+    """
+    model, list_url = (AddCash, 'cash_list') if kind == 'cash' else (Expense, 'expense_list')
+    back = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(back, allowed_hosts={request.get_host()}):
+        back = reverse(list_url)
+    
+    try:
+        pks = {int(pk) for pk in request.POST.getlist('ids')}
+    except ValueError:
+        return HttpResponseBadRequest('Invalid entry ids.')
+    if not pks:
+        messages.error(request, 'Select at least one entry!')
+        return redirect(back)
+    if len(pks) > get_bulk_max_items():
+        messages.error(request, f'Select at most {get_bulk_max_items()} entries at a time!')
+        return redirect(back)
+    
+    action = request.POST.get('action')
+    if action == 'delete':
+        try:
+            count = delete_entries(request.user, model, pks)
+        except RowsChanged:
+            messages.error(request, 'Some of these entries were just deleted elsewhere. Nothing was deleted, try again!')
+            return redirect(back)
+        messages.success(request, f'Deleted {count} entr{"y" if count == 1 else "ies"}!')
+    elif action == 'set_source' and model is AddCash:
+        source = request.POST.get('source', '').strip()
+        if not source or len(source) > SOURCE_MAX_LENGTH:
+            messages.error(request, f'Source must be 1 to {SOURCE_MAX_LENGTH} characters!')
+            return redirect(back)
+        count = set_source(request.user, pks, source)
+        messages.success(request, f'Moved {count} entr{"y" if count == 1 else "ies"} to {source}!')
+    else:
+        return HttpResponseBadRequest('Unknown action.')
+    return redirect(back)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Per-section hit/miss counters of the per-user cache, for monitoring."""
+    return JsonResponse(stats())
+
+
 @login_required(login_url='login')
 def profile(request):
     """View for managing user profile"""
-    # Get profile using Django's reverse relation
-    try:
-        profile = request.user.profile
-    except Profile.DoesNotExist:
-        profile = Profile.objects.create(user=request.user)
+    # Loaded with the user by ProfileBackend; created here if it is missing
+    profile = get_profile(request.user)
     
     if request.method == 'POST':
         first_name = request.POST.get('first_name', '')
@@ -274,24 +690,29 @@ def profile(request):
             messages.error(request, 'Email already in use!')
             return render(request, 'ManageCash/profile.html', {'profile': profile})
         
+        uploaded_file = request.FILES.get('profile_picture')
+        if uploaded_file:
+            try:
+                validate_upload(uploaded_file)
+            except InvalidImage as exc:
+                messages.error(request, f'{exc}!')
+                return render(request, 'ManageCash/profile.html', {'profile': profile})
+        
         # Update user profile
         request.user.first_name = first_name
         request.user.last_name = last_name
         request.user.email = email
         request.user.save()
         
-        # Handle profile picture upload
-        if 'profile_picture' in request.FILES:
-            uploaded_file = request.FILES['profile_picture']
-            profile.profile_picture.save(uploaded_file.name, uploaded_file, save=True)
-            print(f"Profile picture saved: {profile.profile_picture.name}")
+        # Resized and thumbnailed on a worker thread; the old files are
+        # deleted once the new ones are in place
+        if uploaded_file:
+            stage_upload(profile, uploaded_file)
         
         # Handle remove profile picture
-        if 'remove_profile_picture' in request.POST:
-            if profile.profile_picture:
-                profile.profile_picture.delete(save=True)
-                profile.profile_picture = None
-                profile.save()
+        elif 'remove_profile_picture' in request.POST:
+            if profile.profile_picture or profile.picture_pending:
+                clear_pictures(profile)
             
         messages.success(request, 'Profile updated successfully!')
         return redirect('profile')
@@ -340,3 +761,21 @@ def password_change(request):
         return redirect('dashboard')
     
     return render(request, 'ManageCash/password_change.html')
+
+
+@login_required(login_url='login')
+@require_http_methods(["POST"])
+def delete_account(request):
+    """Deactivate the account at once; its entries and the user are deleted by a job."""
+    if not request.user.check_password(request.POST.get('password', '')):
+        messages.error(request, 'Password is incorrect; your account was not deleted.')
+        return redirect('profile')
+    
+    user = request.user
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        enqueue('delete_account', user, user_id=user.pk)
+    logout(request)
+    messages.success(request, 'Your account has been closed and its data is being deleted.')
+    return redirect('login')